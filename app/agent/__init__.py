@@ -2,4 +2,4 @@
 Agent package - Agno agent with MCP integration
 """
 
-__all__ = ["build_agent", "build_agent_sync", "run_sync"]
+__all__ = ["build_agent", "build_agent_sync", "run_sync", "run_async", "get_cache_stats"]
@@ -1,36 +1,135 @@
 from __future__ import annotations
 
 import os
+import time
 import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from agno.agent import Agent
 from agno.tools.mcp import MCPTools, StreamableHTTPClientParams
 from agno.models.google import Gemini
 
-__all__ = ["build_agent", "build_agent_sync", "run_sync"]
+__all__ = ["build_agent", "build_agent_sync", "run_sync", "run_async", "get_cache_stats"]
+
+logger = logging.getLogger(__name__)
+
+# Falhas esperadas (timeouts do Gemini/MCP): registradas sem traceback
+_BENIGN_ERRORS = (TimeoutError, asyncio.TimeoutError)
 
 # Tentar importar o config_loader, mas não falhar se não estiver disponível
 try:
-    from app.config_loader import config as app_config
+    from app.config_loader import get_config
     USE_CONFIG_LOADER = True
 except ImportError:
     USE_CONFIG_LOADER = False
 
+# Cache de agentes por credenciais: evita recriar Gemini/MCPTools a cada chamada
+_AGENT_CACHE: dict[tuple[str, str, str], Agent] = {}
+_AGENT_LOCK = threading.Lock()
+_CACHE_STATS = {"hits": 0, "misses": 0}
 
-def build_agent() -> Agent:
+# Prompt de sistema montado uma única vez no import
+_SYSTEM_PROMPT = """Você é um analista financeiro especializado em dados do mercado brasileiro.
+
+FERRAMENTAS MCP DISPONÍVEIS (brapi.dev/docs/mcp):
+📊 Públicas: get_available_stocks, get_available_currencies, get_available_cryptocurrencies, get_available_inflation_countries
+💎 Premium: get_stock_quotes, get_currency_rates, get_crypto_prices, get_inflation_data, get_prime_rate_data
+
+FILTROS CORRETOS PARA get_available_stocks:
+Setores (sector):
+  - Finance (Bancos e instituições financeiras)
+  - Energy Minerals (Petróleo e energia)
+  - Technology Services (Tecnologia)
+  - Health Services (Saúde)
+  - Retail Trade (Varejo)
+  - Utilities (Energia elétrica e saneamento)
+
+Tipos (type):
+  - stock (Ações)
+  - fund (Fundos imobiliários - FIIs)
+  - bdr (Brazilian Depositary Receipts)
+
+Ordenação (sort):
+  - volume (Volume de negociação)
+  - market_cap_basic (Valor de mercado)
+  - change (Variação percentual)
+  - close (Preço de fechamento)
+  - name (Ordem alfabética)
+
+ESTRATÉGIA DE USO:
+1. Para DESCOBERTA (listar ativos):
+   - Use get_available_stocks com filtros corretos
+   - Exemplo: sector='Finance' para bancos
+   - Exemplo: sector='Energy Minerals' para energia
+   - Exemplo: sort='volume' para ordenar por volume
+
+2. Para COTAÇÕES E DADOS:
+   - Use get_stock_quotes com ticker específico
+   - Use get_currency_rates com par (USD-BRL, EUR-BRL, etc)
+   - Use get_crypto_prices com símbolo (BTC, ETH, etc)
+
+EXEMPLOS DE CONSULTAS CORRETAS:
+- 'Quais são os bancos mais negociados?' → get_available_stocks(sector='Finance', sort='volume')
+- 'Ações de energia com maior volume' → get_available_stocks(sector='Energy Minerals', sort='volume')
+- 'Qual a cotação de PETR4?' → get_stock_quotes(tickers='PETR4')
+- 'Fundos imobiliários disponíveis' → get_available_stocks(type='fund')
+
+FORMATO DE RESPOSTA:
+- Use markdown para formatar
+- SEMPRE execute as ferramentas MCP para obter dados reais
+- SEMPRE mostre TODOS os resultados obtidos das ferramentas
+- Quando listar ativos, mostre em formato de tabela markdown com colunas: Ticker | Nome | Setor (se aplicável)
+- Se o usuário pedir N itens, mostre EXATAMENTE N itens (ou todos se houver menos)
+- Formate listas grandes em tabelas markdown com colunas relevantes
+- Não resuma ou omita resultados - mostre tudo que a ferramenta retornar
+- Não faça suposições - sempre use as ferramentas para obter dados reais
+- Não mostre erros internos de ferramentas, apenas resultados úteis
+- Após executar a ferramenta, SEMPRE mostre a lista completa de resultados"""
+
+
+# Cache de respostas do agente: prompts normalizados idênticos não repetem Gemini + MCP.
+# TTL curto por padrão (cotações mudam rápido); listagens de catálogo vivem mais.
+_RESPONSE_CACHE: OrderedDict[tuple[int, bytes], tuple[float, str]] = OrderedDict()
+_RESPONSE_CACHE_MAXSIZE = 1024
+_RESPONSE_TTL_SECONDS = 60
+_RESPONSE_TTL_CATALOG_SECONDS = 3600
+_RESPONSE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _mcp_server_params(brapi_mcp_url: str, brapi_token: str) -> StreamableHTTPClientParams:
+    """Parâmetros de conexão MCP (URL + header de autorização) por par (url, token)."""
+    return StreamableHTTPClientParams(
+        url=brapi_mcp_url,
+        headers={"Authorization": f"Bearer {brapi_token}"}
+    )
+
+
+def _resolve_credentials() -> tuple[str, str, str]:
+    """Retorna (brapi_mcp_url, brapi_token, gemini_api_key) da fonte de configuração ativa."""
+    # Usar config_loader se disponível, caso contrário fallback para os.getenv
+    if USE_CONFIG_LOADER:
+        cfg = get_config()
+        return (
+            cfg.brapi.mcp_url,
+            cfg.brapi.api_key,
+            cfg.llm.gemini_api_key,
+        )
+    return (
+        os.getenv("BRAPI_MCP_URL", "https://brapi.dev/api/mcp/mcp"),
+        os.getenv("BRAPI_API_KEY", ""),
+        os.getenv("GEMINI_API_KEY", ""),
+    )
+
+
+def _build_agent_uncached(brapi_mcp_url: str, brapi_token: str, gemini_api_key: str) -> Agent:
     """
     Agente Agno usando Gemini 2.5 Flash + MCP brapi (remoto).
     Suporta múltiplas fontes de configuração: Streamlit Secrets, TOML, .env
     """
-    # Usar config_loader se disponível, caso contrário fallback para os.getenv
-    if USE_CONFIG_LOADER:
-        brapi_mcp_url = app_config.brapi.mcp_url
-        brapi_token = app_config.brapi.api_key
-        gemini_api_key = app_config.llm.gemini_api_key
-    else:
-        brapi_mcp_url = os.getenv("BRAPI_MCP_URL", "https://brapi.dev/api/mcp/mcp")
-        brapi_token = os.getenv("BRAPI_API_KEY", "")
-        gemini_api_key = os.getenv("GEMINI_API_KEY", "")
-
     if not brapi_token:
         raise RuntimeError("BRAPI_API_KEY não configurado. Configure via Streamlit Secrets, config.toml ou .env")
 
@@ -43,61 +142,7 @@ def build_agent() -> Agent:
         max_output_tokens=60000  # Aumentar limite de tokens para respostas longas
     )
 
-    system_prompt = (
-        "Você é um analista financeiro especializado em dados do mercado brasileiro.\n\n"
-        "FERRAMENTAS MCP DISPONÍVEIS (brapi.dev/docs/mcp):\n"
-        "📊 Públicas: get_available_stocks, get_available_currencies, get_available_cryptocurrencies, get_available_inflation_countries\n"
-        "💎 Premium: get_stock_quotes, get_currency_rates, get_crypto_prices, get_inflation_data, get_prime_rate_data\n\n"
-        "FILTROS CORRETOS PARA get_available_stocks:\n"
-        "Setores (sector):\n"
-        "  - Finance (Bancos e instituições financeiras)\n"
-        "  - Energy Minerals (Petróleo e energia)\n"
-        "  - Technology Services (Tecnologia)\n"
-        "  - Health Services (Saúde)\n"
-        "  - Retail Trade (Varejo)\n"
-        "  - Utilities (Energia elétrica e saneamento)\n\n"
-        "Tipos (type):\n"
-        "  - stock (Ações)\n"
-        "  - fund (Fundos imobiliários - FIIs)\n"
-        "  - bdr (Brazilian Depositary Receipts)\n\n"
-        "Ordenação (sort):\n"
-        "  - volume (Volume de negociação)\n"
-        "  - market_cap_basic (Valor de mercado)\n"
-        "  - change (Variação percentual)\n"
-        "  - close (Preço de fechamento)\n"
-        "  - name (Ordem alfabética)\n\n"
-        "ESTRATÉGIA DE USO:\n"
-        "1. Para DESCOBERTA (listar ativos):\n"
-        "   - Use get_available_stocks com filtros corretos\n"
-        "   - Exemplo: sector='Finance' para bancos\n"
-        "   - Exemplo: sector='Energy Minerals' para energia\n"
-        "   - Exemplo: sort='volume' para ordenar por volume\n\n"
-        "2. Para COTAÇÕES E DADOS:\n"
-        "   - Use get_stock_quotes com ticker específico\n"
-        "   - Use get_currency_rates com par (USD-BRL, EUR-BRL, etc)\n"
-        "   - Use get_crypto_prices com símbolo (BTC, ETH, etc)\n\n"
-        "EXEMPLOS DE CONSULTAS CORRETAS:\n"
-        "- 'Quais são os bancos mais negociados?' → get_available_stocks(sector='Finance', sort='volume')\n"
-        "- 'Ações de energia com maior volume' → get_available_stocks(sector='Energy Minerals', sort='volume')\n"
-        "- 'Qual a cotação de PETR4?' → get_stock_quotes(tickers='PETR4')\n"
-        "- 'Fundos imobiliários disponíveis' → get_available_stocks(type='fund')\n\n"
-        "FORMATO DE RESPOSTA:\n"
-        "- Use markdown para formatar\n"
-        "- SEMPRE execute as ferramentas MCP para obter dados reais\n"
-        "- SEMPRE mostre TODOS os resultados obtidos das ferramentas\n"
-        "- Quando listar ativos, mostre em formato de tabela markdown com colunas: Ticker | Nome | Setor (se aplicável)\n"
-        "- Se o usuário pedir N itens, mostre EXATAMENTE N itens (ou todos se houver menos)\n"
-        "- Formate listas grandes em tabelas markdown com colunas relevantes\n"
-        "- Não resuma ou omita resultados - mostre tudo que a ferramenta retornar\n"
-        "- Não faça suposições - sempre use as ferramentas para obter dados reais\n"
-        "- Não mostre erros internos de ferramentas, apenas resultados úteis\n"
-        "- Após executar a ferramenta, SEMPRE mostre a lista completa de resultados"
-    )
-
-    server_params = StreamableHTTPClientParams(
-        url=brapi_mcp_url,
-        headers={"Authorization": f"Bearer {brapi_token}"}
-    )
+    server_params = _mcp_server_params(brapi_mcp_url, brapi_token)
 
     # Create MCPTools without context manager - it will be managed by the Agent
     brapi_mcp = MCPTools(transport="streamable-http", server_params=server_params)
@@ -106,35 +151,121 @@ def build_agent() -> Agent:
         name="finance-buddy",
         model=model,
         tools=[brapi_mcp],
-        instructions=system_prompt,
+        instructions=_SYSTEM_PROMPT,
         markdown=True,
     )
     return agent
 
 
-def run_sync(agent: Agent, message: str) -> str:
+def build_agent() -> Agent:
     """
-    Versão síncrona para uso no Streamlit.
-    Executa o agente e retorna a resposta completa com resultados das ferramentas.
+    Retorna o agente para as credenciais atuais, reaproveitando a instância já criada.
+    A construção (Gemini + MCPTools) acontece apenas no primeiro acesso por credencial.
     """
+    key = _resolve_credentials()
+    with _AGENT_LOCK:
+        agent = _AGENT_CACHE.get(key)
+        if agent is None:
+            _CACHE_STATS["misses"] += 1
+            agent = _build_agent_uncached(*key)
+            _AGENT_CACHE[key] = agent
+        else:
+            _CACHE_STATS["hits"] += 1
+        return agent
+
+
+def get_cache_stats() -> dict[str, int]:
+    """Estatísticas do cache de agentes (hits, misses e instâncias em cache)."""
+    with _AGENT_LOCK:
+        return {**_CACHE_STATS, "size": len(_AGENT_CACHE)}
+
+
+def _response_key(agent: Agent, message: str) -> tuple[int, bytes]:
+    """Chave do cache: agente + prompt normalizado (caixa e espaços)."""
+    normalized = " ".join(message.casefold().split())
+    return id(agent), hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+
+def _response_ttl(result: object) -> int:
+    """TTL longo apenas quando todas as ferramentas usadas foram de listagem (get_available_*)."""
+    tools = getattr(result, "tools", None) or []
+    names = [getattr(t, "tool_name", None) for t in tools]
+    if names and all(n and n.startswith("get_available_") for n in names):
+        return _RESPONSE_TTL_CATALOG_SECONDS
+    return _RESPONSE_TTL_SECONDS
+
+
+def _cached_response(key: tuple[int, bytes]) -> str | None:
+    with _RESPONSE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if time.monotonic() >= expires_at:
+            del _RESPONSE_CACHE[key]
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+        return response
+
+
+def _store_response(key: tuple[int, bytes], response: str, ttl: int) -> None:
+    with _RESPONSE_LOCK:
+        _RESPONSE_CACHE[key] = (time.monotonic() + ttl, response)
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > _RESPONSE_CACHE_MAXSIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
+def _invoke(agent: Agent, message: str, key: tuple[int, bytes]) -> str:
+    """Chamada bloqueante ao agente (Gemini + MCP); erros viram mensagem de retorno."""
     try:
         # Use agent.run() for synchronous execution without streaming
         result = agent.run(message, stream=False)
         
         # Extract the content from the RunOutput object
-        if hasattr(result, 'content'):
-            content = result.content
-            if content is not None:
-                return str(content)
+        content = getattr(result, "content", None)
+        if content is not None:
+            response = str(content)
+            _store_response(key, response, _response_ttl(result))
+            return response
         
         # Fallback para string representation
         return str(result) if result is not None else "Nenhuma resposta disponível"
+    except _BENIGN_ERRORS as e:
+        logger.warning("run_sync timeout: %s", e, extra={"msg_len": len(message)})
+        return f"Erro ao processar requisição: {str(e)}"
     except Exception as e:
-        import traceback
-        error_msg = f"Erro ao processar requisição: {str(e)}"
-        print(f"❌ {error_msg}")
-        traceback.print_exc()
-        return error_msg
+        logger.exception("run_sync failure", extra={"msg_len": len(message)})
+        return f"Erro ao processar requisição: {str(e)}"
+
+
+def run_sync(agent: Agent | None, message: str) -> str:
+    """
+    Versão síncrona para uso no Streamlit.
+    Executa o agente e retorna a resposta completa com resultados das ferramentas.
+    Sem agente explícito (ex.: ``app.state.agent`` ainda vazio), usa o agente em cache.
+    """
+    if agent is None:
+        agent = build_agent()
+    key = _response_key(agent, message)
+    cached = _cached_response(key)
+    if cached is not None:
+        return cached
+    return _invoke(agent, message, key)
+
+
+async def run_async(agent: Agent | None, message: str) -> str:
+    """
+    Versão assíncrona de ``run_sync`` para rotas FastAPI: a chamada bloqueante
+    ao agente roda em thread, sem travar o event loop.
+    """
+    if agent is None:
+        agent = await asyncio.to_thread(build_agent)
+    key = _response_key(agent, message)
+    cached = _cached_response(key)
+    if cached is not None:
+        return cached
+    return await asyncio.to_thread(_invoke, agent, message, key)
 
 
 # Alias for backward compatibility
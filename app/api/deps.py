@@ -0,0 +1,29 @@
+"""Dependências compartilhadas entre rotas."""
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+from app.services.utils.symbols import parse_tickers
+
+_TICKERS_DESCRIPTION = "Lista de tickers separados por vírgula, ex: PETR4,VALE3"
+
+
+def _require_tickers(tickers: str) -> list[str]:
+    ticker_list = parse_tickers(tickers)
+    if not ticker_list:
+        raise HTTPException(status_code=400, detail="Nenhum ticker válido fornecido")
+    return ticker_list
+
+
+def get_ticker_list(
+    tickers: str = Query(..., max_length=2048, description=_TICKERS_DESCRIPTION),
+) -> list[str]:
+    """Tickers obrigatórios: normalizados (maiúsculas, sem duplicados); lista vazia → 400."""
+    return _require_tickers(tickers)
+
+
+def get_optional_ticker_list(
+    tickers: Optional[str] = Query(None, max_length=2048, description=f"{_TICKERS_DESCRIPTION} (opcional)"),
+) -> Optional[list[str]]:
+    """Como ``get_ticker_list``, mas ``None`` quando o parâmetro não é enviado."""
+    return _require_tickers(tickers) if tickers else None
@@ -1,19 +1,44 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+import time
+import orjson
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select, func
+from app.core.responses import ORJSONResponse
 from app.db.session import get_session
+from app.models import Asset
 from app.services.catalog_service import list_assets, sync_assets, get_asset_by_ticker
 
 router = APIRouter(prefix="/api/catalog", tags=["catalog"])
 
+# Agregado de setores muda apenas na sincronização → cache em memória (5 min)
+_SECTORS_TTL_SECONDS = 300
+_SECTORS_CACHE: dict = {"ts": 0.0, "data": None}
+
+_VALID_ASSET_TYPES: frozenset[str] = frozenset({"stock", "fund", "bdr", "etf", "index"})
+_INVALID_TYPE_MSG = f"Tipo de ativo inválido. Use: {', '.join(sorted(_VALID_ASSET_TYPES))}"
+
+# Corpo estático de /types serializado uma única vez no import
+_TYPES_BYTES = orjson.dumps({
+    "types": [
+        {"value": "stock", "label": "Ações"},
+        {"value": "fund", "label": "Fundos Imobiliários (FIIs)"},
+        {"value": "bdr", "label": "BDRs"},
+        {"value": "etf", "label": "ETFs"},
+        {"value": "index", "label": "Índices"}
+    ]
+})
+_STATIC_CACHE_HEADERS = {"Cache-Control": "public, max-age=86400"}
+
 @router.get("/assets")
 async def get_assets(
     type: Optional[str] = Query(None, description="Tipo de ativo: stock, fund, bdr, etf, index"),
     sector: Optional[str] = Query(None, description="Filtrar por setor"),
     search: Optional[str] = Query(None, description="Buscar por nome ou ticker"),
-    page: int = Query(1, ge=1, description="Número da página"),
+    page: int = Query(1, ge=1, description="Número da página (obsoleto: prefira `cursor`)"),
     limit: int = Query(50, ge=1, le=100, description="Itens por página (máx 100)"),
     sort_by: str = Query("name", description="Ordenação: name, ticker, sector, updated_at"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (`next_cursor` da resposta anterior)"),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -23,9 +48,10 @@ async def get_assets(
     - `type`: Filtrar por tipo de ativo (stock, fund, bdr, etf, index)
     - `sector`: Filtrar por setor econômico
     - `search`: Buscar por nome ou ticker (case insensitive)
-    - `page`: Número da página (inicia em 1)
+    - `page`: Número da página (inicia em 1). Obsoleto: use `cursor`
     - `limit`: Itens por página (1-100)
     - `sort_by`: Ordenação dos resultados
+    - `cursor`: Paginação keyset; envie o `next_cursor` recebido para obter a próxima página
     
     **Retorno:**
     ```json
@@ -47,7 +73,8 @@ async def get_assets(
         "limit": 50,
         "total": 1250,
         "pages": 25
-      }
+      },
+      "next_cursor": "eyJzIjoibmFtZSIsInYiOlsiUEVUUk9CUkFTIFBOIiwxMjNdfQ=="
     }
     ```
     """
@@ -59,9 +86,13 @@ async def get_assets(
             search=search,
             page=page,
             limit=limit,
-            sort_by=sort_by
+            sort_by=sort_by,
+            cursor=cursor,
         )
-        return result
+        # payload já contém apenas tipos JSON nativos → serializa direto, sem jsonable_encoder
+        return ORJSONResponse(content=result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar ativos: {str(e)}")
 
@@ -137,16 +168,13 @@ async def sync_assets_endpoint(
     }
     ```
     """
+    # Validar tipo de ativo antes de qualquer I/O
+    if asset_type not in _VALID_ASSET_TYPES:
+        raise HTTPException(status_code=400, detail=_INVALID_TYPE_MSG)
+
     try:
-        # Validar tipo de ativo
-        valid_types = ["stock", "fund", "bdr", "etf", "index"]
-        if asset_type not in valid_types:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Tipo de ativo inválido. Use: {', '.join(valid_types)}"
-            )
-        
         stats = await sync_assets(session, asset_type, limit)
+        _SECTORS_CACHE["ts"] = 0.0
         
         return {
             "message": f"Sincronização de {asset_type} concluída",
@@ -175,15 +203,7 @@ async def get_asset_types():
     }
     ```
     """
-    return {
-        "types": [
-            {"value": "stock", "label": "Ações"},
-            {"value": "fund", "label": "Fundos Imobiliários (FIIs)"},
-            {"value": "bdr", "label": "BDRs"},
-            {"value": "etf", "label": "ETFs"},
-            {"value": "index", "label": "Índices"}
-        ]
-    }
+    return Response(_TYPES_BYTES, media_type="application/json", headers=_STATIC_CACHE_HEADERS)
 
 @router.get("/sectors")
 async def get_sectors(
@@ -203,9 +223,10 @@ async def get_sectors(
     }
     ```
     """
+    if _SECTORS_CACHE["data"] is not None and time.monotonic() - _SECTORS_CACHE["ts"] < _SECTORS_TTL_SECONDS:
+        return _SECTORS_CACHE["data"]
+
     try:
-        from sqlmodel import select, func
-        
         # Buscar setores distintos e contagem
         query = (
             select(Asset.sector, func.count(Asset.id).label("count"))
@@ -217,11 +238,14 @@ async def get_sectors(
         result = await session.execute(query)
         sectors = result.all()
         
-        return {
+        data = {
             "sectors": [
                 {"value": sector, "count": count}
                 for sector, count in sectors if sector
             ]
         }
+        _SECTORS_CACHE["data"] = data
+        _SECTORS_CACHE["ts"] = time.monotonic()
+        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar setores: {str(e)}")
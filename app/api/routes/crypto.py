@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, Query
+import re
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_session
+from app.services.utils.symbols import parse_symbols
 from app.services.crypto_service import get_crypto
 
 router = APIRouter(prefix="/api", tags=["crypto"])
 
+_COIN_RE = re.compile(r"^[A-Z0-9]{2,10}$")
+
 @router.get("/crypto")
 async def crypto(
     coin: str = Query(..., description="Criptomoedas separadas por vírgula, ex: BTC,ETH,USDT"),
@@ -40,4 +44,7 @@ async def crypto(
     
     **Uso:** Monitoramento de preços de criptomoedas em diferentes moedas.
     """
-    return await get_crypto(session, coin, currency)
+    symbols = parse_symbols(coin)
+    if not symbols or not all(_COIN_RE.match(s) for s in symbols):
+        raise HTTPException(status_code=400, detail=f"Lista de criptomoedas inválida: {coin}")
+    return await get_crypto(session, ",".join(symbols), currency)
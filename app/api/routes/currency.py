@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, Query
+import re
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_session
+from app.services.utils.symbols import parse_symbols
 from app.services.currency_service import get_currency
 
 router = APIRouter(prefix="/api", tags=["currency"])
 
+_PAIR_RE = re.compile(r"^[A-Z]{3}-[A-Z]{3}$")
+
 @router.get("/currency")
 async def currency(
     currency: str = Query(..., description="Pares de moedas separados por vírgula, ex: USD-BRL,EUR-BRL,GBP-BRL"),
@@ -41,4 +45,7 @@ async def currency(
     
     **Uso:** Conversão de moedas e monitoramento de câmbio.
     """
-    return await get_currency(session, currency)
+    symbols = parse_symbols(currency)
+    if not symbols or not all(_PAIR_RE.match(s) for s in symbols):
+        raise HTTPException(status_code=400, detail=f"Pares de moedas inválidos: {currency}")
+    return await get_currency(session, ",".join(symbols))
@@ -1,11 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import re
+
+import msgspec
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.responses import ORJSONResponse
 from app.db.session import get_session
-from app.services.history_service import get_history
+from app.services.history_service import get_history, iter_history_ndjson, to_columnar
 
 router = APIRouter(prefix="/api/quote", tags=["quote-history"])
 
+_MSGPACK_ENCODER = msgspec.msgpack.Encoder()
+
+# Ticker B3 (PETR4, HGLG11, PETR4F, BDRs como M1TA34) ou índice (^BVSP)
+_TICKER_RE = re.compile(r"^(?:[A-Z0-9]{4}\d{1,2}F?|\^[A-Z0-9]{2,10})$")
+
+
+def _validate_ticker(ticker: str) -> None:
+    if not _TICKER_RE.match(ticker.strip().upper()):
+        raise HTTPException(status_code=400, detail=f"Ticker inválido: {ticker}")
+
 
 @router.get("/history")
 async def quote_history(
@@ -55,11 +70,82 @@ async def quote_history(
     - Datas em ISO 8601 (não timestamp)
     - Sem dados fundamentalistas
     """
+    _validate_ticker(ticker)
     try:
         data = await get_history(session, ticker, period, interval)
-        return data
+        # payload já normalizado (datas ISO) → serializa direto, sem jsonable_encoder
+        return ORJSONResponse(content=data)
     except HTTPException:
         raise
     except Exception as e:
         # erro inesperado do nosso lado → 500
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/history.msgpack")
+async def quote_history_msgpack(
+    ticker: str = Query(..., description="Ticker do ativo, ex: HGLG11, PETR4, VALE3"),
+    period: str = Query("3mo", description="Período: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max"),
+    interval: str = Query("1d", description="Intervalo: 1m, 5m, 15m, 1h, 1d, 1wk, 1mo"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Mesmo histórico OHLCV de `/api/quote/history`, codificado em MessagePack
+    e em layout colunar (uma lista por campo).
+
+    **Retorna (application/x-msgpack):**
+    ```json
+    {
+      "cached": false,
+      "symbol": "HGLG11",
+      "dates": ["2025-07-25T13:00:00+00:00", "2025-07-28T13:00:00+00:00"],
+      "opens": [154.89, 156.30],
+      "highs": [156.62, 156.30],
+      "lows": [153.81, 153.99],
+      "closes": [155.71, 154.70],
+      "volumes": [36429, 45039]
+    }
+    ```
+
+    **Uso:** Consumidores internos (agente MCP, jobs) que precisam de payload compacto.
+    Clientes externos devem continuar usando o endpoint JSON.
+    """
+    _validate_ticker(ticker)
+    try:
+        data = await get_history(session, ticker, period, interval)
+        return Response(_MSGPACK_ENCODER.encode(to_columnar(data)), media_type="application/x-msgpack")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/history.ndjson")
+async def quote_history_ndjson(
+    ticker: str = Query(..., description="Ticker do ativo, ex: HGLG11, PETR4, VALE3"),
+    period: str = Query("3mo", description="Período: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max"),
+    interval: str = Query("1d", description="Intervalo: 1m, 5m, 15m, 1h, 1d, 1wk, 1mo"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Mesmo histórico OHLCV de `/api/quote/history`, transmitido como NDJSON
+    (um objeto JSON por linha) via streaming.
+
+    **Retorna (application/x-ndjson):**
+    ```
+    {"cached":false,"symbol":"HGLG11","count":2}
+    {"date":"2025-07-25T13:00:00+00:00","open":154.89,"high":156.62,"low":153.81,"close":155.71,"volume":36429}
+    {"date":"2025-07-28T13:00:00+00:00","open":156.3,"high":156.3,"low":153.99,"close":154.7,"volume":45039}
+    ```
+
+    **Uso:** Históricos longos (`period=max`): o cliente processa os candles
+    à medida que chegam, sem esperar o corpo completo.
+    """
+    _validate_ticker(ticker)
+    try:
+        data = await get_history(session, ticker, period, interval)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(iter_history_ndjson(data), media_type="application/x-ndjson")
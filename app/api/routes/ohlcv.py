@@ -1,20 +1,36 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from typing import Optional
+from typing import Literal, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from app.core.responses import ORJSONResponse
+from app.api.deps import get_ticker_list, get_optional_ticker_list
 from app.db.session import get_session
-from app.services.ohlcv_service import get_ohlcv, backfill_ohlcv, update_ohlcv_latest, get_available_dates
-from app.services.catalog_service import get_asset_by_ticker
+from app.services.ohlcv_service import get_ohlcv, backfill_ohlcv, update_ohlcv_latest, get_available_dates, get_tickers_with_ohlcv
+from app.services.catalog_service import get_catalog_tickers
 
 router = APIRouter(prefix="/api/ohlcv", tags=["ohlcv"])
 
-@router.get("")
+# Valores aceitos: validados pelo FastAPI (422) antes de entrar no handler
+OhlcvPeriod = Literal["1mo", "3mo", "6mo", "1y", "2y", "max"]
+OhlcvInterval = Literal["1d", "1wk", "1mo"]
+BackfillRange = Literal["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"]
+
+# Janela de cada período ("max" não tem limite inferior)
+_PERIOD_DELTAS = {
+    "1mo": timedelta(days=30),
+    "3mo": timedelta(days=90),
+    "6mo": timedelta(days=180),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=730),
+}
+
+@router.get("", response_class=ORJSONResponse)
 async def get_ohlcv_data(
     ticker: str = Query(..., description="Símbolo do ativo (ex: PETR4, VALE3)"),
-    period: str = Query("3mo", description="Período: 1mo, 3mo, 6mo, 1y, 2y, max"),
-    interval: str = Query("1d", description="Intervalo: 1d, 1wk, 1mo"),
-    start_date: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
+    period: OhlcvPeriod = Query("3mo", description="Período: 1mo, 3mo, 6mo, 1y, 2y, max"),
+    interval: OhlcvInterval = Query("1d", description="Intervalo: 1d, 1wk, 1mo"),
+    start_date: Optional[date] = Query(None, description="Data inicial (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Data final (YYYY-MM-DD)"),
     limit: Optional[int] = Query(None, ge=1, le=1000, description="Limite de registros"),
     session: AsyncSession = Depends(get_session),
 ):
@@ -48,59 +64,35 @@ async def get_ohlcv_data(
     }
     ```
     """
-    try:
-        # Validar que o ativo existe no catálogo
-        asset = await get_asset_by_ticker(session, ticker)
-        if not asset:
-            raise HTTPException(status_code=404, detail=f"Ativo {ticker} não encontrado no catálogo")
-        
-        # Converter datas se fornecidas
-        start_dt = None
-        end_dt = None
-        
-        if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de start_date inválido. Use YYYY-MM-DD")
-        
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de end_date inválido. Use YYYY-MM-DD")
-        
-        # Se não especificou datas mas especificou period, calcular datas
-        if not start_dt and not end_dt and period != "max":
-            end_dt = datetime.utcnow()
-            if period == "1mo":
-                start_dt = end_dt - timedelta(days=30)
-            elif period == "3mo":
-                start_dt = end_dt - timedelta(days=90)
-            elif period == "6mo":
-                start_dt = end_dt - timedelta(days=180)
-            elif period == "1y":
-                start_dt = end_dt - timedelta(days=365)
-            elif period == "2y":
-                start_dt = end_dt - timedelta(days=730)
-        
-        # Buscar dados
-        result = await get_ohlcv(
-            session=session,
-            ticker=ticker,
-            start_date=start_dt,
-            end_date=end_dt,
-            limit=limit
-        )
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar dados OHLCV: {str(e)}")
+    # Validar que o ativo existe no catálogo
+    if ticker.upper().strip() not in await get_catalog_tickers(session):
+        raise HTTPException(status_code=404, detail=f"Ativo {ticker} não encontrado no catálogo")
+    
+    # Datas já validadas pelo FastAPI (422 se inválidas); vira datetime à meia-noite
+    start_dt = datetime.combine(start_date, dt_time.min) if start_date else None
+    end_dt = datetime.combine(end_date, dt_time.min) if end_date else None
+    
+    # Se não especificou datas mas especificou period, calcular datas
+    delta = _PERIOD_DELTAS.get(period)
+    if not start_dt and not end_dt and delta:
+        # Janela ancorada no início do dia e sem limite superior: a chave de
+        # cache do serviço fica estável durante o dia (o instante atual mudaria a cada chamada)
+        today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        start_dt = today - delta
+    
+    # Buscar dados
+    result = await get_ohlcv(
+        session=session,
+        ticker=ticker,
+        start_date=start_dt,
+        end_date=end_dt,
+        limit=limit
+    )
+    
+    # payload já contém apenas tipos JSON nativos → serializa direto, sem jsonable_encoder
+    return ORJSONResponse(content=result)
 
-@router.get("/dates/{ticker}")
+@router.get("/dates/{ticker}", response_class=ORJSONResponse)
 async def get_available_dates_endpoint(
     ticker: str,
     session: AsyncSession = Depends(get_session),
@@ -120,31 +112,25 @@ async def get_available_dates_endpoint(
     }
     ```
     """
-    try:
-        # Validar que o ativo existe
-        asset = await get_asset_by_ticker(session, ticker)
-        if not asset:
-            raise HTTPException(status_code=404, detail=f"Ativo {ticker} não encontrado")
-        
-        dates = await get_available_dates(session, ticker)
-        
-        return {
-            "ticker": ticker.upper(),
-            "dates": dates,
-            "count": len(dates)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao buscar datas: {str(e)}")
+    # Validar que o ativo existe
+    if ticker.upper().strip() not in await get_catalog_tickers(session):
+        raise HTTPException(status_code=404, detail=f"Ativo {ticker} não encontrado")
+    
+    dates = await get_available_dates(session, ticker)
+    
+    return ORJSONResponse(content={
+        "ticker": ticker.upper(),
+        "dates": dates,
+        "count": len(dates)
+    })
 
 @router.post("/backfill")
 async def backfill_ohlcv_endpoint(
-    tickers: str = Query(..., description="Lista de tickers separados por vírgula"),
-    range: str = Query("3mo", description="Período: 1mo, 3mo, 6mo, 1y, 2y"),
-    interval: str = Query("1d", description="Intervalo: 1d, 1wk, 1mo"),
-    max_concurrency: int = Query(3, ge=1, le=10, description="Máximo de requisições simultâneas"),
+    ticker_list: list[str] = Depends(get_ticker_list),
+    range: BackfillRange = Query("3mo", description="Período: 1mo, 3mo, 6mo, 1y, 2y (também 1d, 5d, 5y, 10y, ytd, max)"),
+    interval: OhlcvInterval = Query("1d", description="Intervalo: 1d, 1wk, 1mo"),
+    max_concurrency: int = Query(3, ge=1, le=10, description="Máximo de requisições (lotes) simultâneas à brapi"),
+    batch_size: int = Query(10, ge=1, le=20, description="Tickers por requisição à brapi (planos pagos agrupam em uma chamada)"),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -156,7 +142,8 @@ async def backfill_ohlcv_endpoint(
     - `tickers`: Lista de símbolos (ex: PETR4,VALE3,MGLU3)
     - `range`: Período histórico
     - `interval`: Intervalo dos dados
-    - `max_concurrency`: Controle de concorrência (respeita rate limit)
+    - `max_concurrency`: Lotes buscados em paralelo (respeita rate limit; gravação sequencial)
+    - `batch_size`: Tickers por requisição à brapi (1-20)
     
     **Retorno:**
     ```json
@@ -172,48 +159,36 @@ async def backfill_ohlcv_endpoint(
     }
     ```
     """
-    try:
-        # Validar e processar tickers
-        ticker_list = [t.strip().upper() for t in tickers.split(",") if t.strip()]
-        if not ticker_list:
-            raise HTTPException(status_code=400, detail="Nenhum ticker válido fornecido")
-        
-        # Validar que todos os tickers existem no catálogo
-        invalid_tickers = []
-        for ticker in ticker_list:
-            asset = await get_asset_by_ticker(session, ticker)
-            if not asset:
-                invalid_tickers.append(ticker)
-        
-        if invalid_tickers:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Tickers não encontrados no catálogo: {', '.join(invalid_tickers)}"
-            )
-        
-        # Executar backfill
-        stats = await backfill_ohlcv(
-            session=session,
-            tickers=ticker_list,
-            range=range,
-            interval=interval,
-            max_concurrency=max_concurrency
+    # Validar que todos os tickers existem no catálogo (conjunto em memória)
+    valid = await get_catalog_tickers(session)
+    invalid_tickers = [t for t in ticker_list if t not in valid]
+    
+    if invalid_tickers:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Tickers não encontrados no catálogo: {', '.join(invalid_tickers)}"
         )
-        
-        return {
-            "message": f"Backfill de {len(ticker_list)} tickers concluído",
-            "stats": stats
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro no backfill: {str(e)}")
+    
+    # Executar backfill
+    stats = await backfill_ohlcv(
+        session=session,
+        tickers=ticker_list,
+        range=range,
+        interval=interval,
+        max_concurrency=max_concurrency,
+        batch_size=batch_size
+    )
+    
+    return {
+        "message": f"Backfill de {len(ticker_list)} tickers concluído",
+        "stats": stats
+    }
 
 @router.post("/update")
 async def update_latest_endpoint(
-    tickers: Optional[str] = Query(None, description="Lista de tickers separados por vírgula (opcional)"),
-    max_concurrency: int = Query(3, ge=1, le=10, description="Máximo de requisições simultâneas"),
+    tickers: Optional[list[str]] = Depends(get_optional_ticker_list),
+    max_concurrency: int = Query(3, ge=1, le=10, description="Máximo de requisições (lotes) simultâneas à brapi"),
+    batch_size: int = Query(10, ge=1, le=20, description="Tickers por requisição à brapi (planos pagos agrupam em uma chamada)"),
     session: AsyncSession = Depends(get_session),
 ):
     """
@@ -221,7 +196,8 @@ async def update_latest_endpoint(
     
     **Parâmetros:**
     - `tickers`: Lista específica de tickers (se não fornecido, atualiza todos)
-    - `max_concurrency`: Controle de concorrência
+    - `max_concurrency`: Lotes buscados em paralelo (gravação sequencial)
+    - `batch_size`: Tickers por requisição à brapi (1-20)
     
     **Retorno:**
     ```json
@@ -237,53 +213,35 @@ async def update_latest_endpoint(
     }
     ```
     """
-    try:
-        ticker_list = []
-        
-        if tickers:
-            # Usar tickers específicos
-            ticker_list = [t.strip().upper() for t in tickers.split(",") if t.strip()]
-            if not ticker_list:
-                raise HTTPException(status_code=400, detail="Nenhum ticker válido fornecido")
-            
-            # Validar que existem no catálogo
-            invalid_tickers = []
-            for ticker in ticker_list:
-                asset = await get_asset_by_ticker(session, ticker)
-                if not asset:
-                    invalid_tickers.append(ticker)
-            
-            if invalid_tickers:
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Tickers não encontrados: {', '.join(invalid_tickers)}"
-                )
-        else:
-            # Atualizar todos os ativos com dados OHLCV
-            from sqlmodel import select, distinct
-            query = select(distinct(QuoteOHLCV.ticker))
-            result = await session.execute(query)
-            ticker_list = result.scalars().all()
-        
-        if not ticker_list:
-            return {"message": "Nenhum ticker para atualizar", "stats": {"processed": 0, "inserted": 0, "updated": 0, "errors": 0, "total_requested": 0}}
+    if tickers:
+        # Usar tickers específicos (já normalizados pela dependência)
+        ticker_list = tickers
         
-        # Executar atualização
-        stats = await update_ohlcv_latest(
-            session=session,
-            tickers=ticker_list,
-            max_concurrency=max_concurrency
-        )
-        
-        return {
-            "message": f"Atualização de {len(ticker_list)} tickers concluída",
-            "stats": stats
-        }
+        # Validar que existem no catálogo (conjunto em memória)
+        valid = await get_catalog_tickers(session)
+        invalid_tickers = [t for t in ticker_list if t not in valid]
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro na atualização: {str(e)}")
-
-# Import necessário para a rota update_latest
-from app.models import QuoteOHLCV
+        if invalid_tickers:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Tickers não encontrados: {', '.join(invalid_tickers)}"
+            )
+    else:
+        # Atualizar todos os ativos com dados OHLCV
+        ticker_list = await get_tickers_with_ohlcv(session)
+    
+    if not ticker_list:
+        return {"message": "Nenhum ticker para atualizar", "stats": {"processed": 0, "inserted": 0, "updated": 0, "errors": 0, "total_requested": 0}}
+    
+    # Executar atualização
+    stats = await update_ohlcv_latest(
+        session=session,
+        tickers=ticker_list,
+        max_concurrency=max_concurrency,
+        batch_size=batch_size
+    )
+    
+    return {
+        "message": f"Atualização de {len(ticker_list)} tickers concluída",
+        "stats": stats
+    }
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, Query
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_ticker_list
 from app.db.session import get_session
 from app.services.quote_service import get_quote
 
@@ -8,7 +9,7 @@ router = APIRouter(prefix="/api", tags=["quote"])
 
 @router.get("/quote")
 async def quote(
-    tickers: str = Query(..., description="Lista separada por vírgula, ex: PETR4,VALE3"),
+    ticker_list: list[str] = Depends(get_ticker_list),
     range: Optional[str] = Query(None, description="Período histórico: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max"),
     interval: Optional[str] = Query(None, description="Intervalo dos dados: 1m, 5m, 15m, 1h, 1d, 1wk, 1mo"),
     modules: Optional[str] = Query(None, description="Módulos adicionais separados por vírgula"),
@@ -42,8 +43,8 @@ async def quote(
     }
     ```
     """
-    params = {}
-    if range: params["range"] = range
-    if interval: params["interval"] = interval
-    if modules: params["modules"] = modules
-    return await get_quote(session, tickers, params)
+    # Caso mais comum (só tickers): nenhum dict é alocado
+    params = None
+    if range or interval or modules:
+        params = {k: v for k, v in (("range", range), ("interval", interval), ("modules", modules)) if v}
+    return await get_quote(session, ",".join(ticker_list), params)
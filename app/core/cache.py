@@ -1,3 +1,4 @@
+import time
 from typing import Iterable
 
 from redis.asyncio import Redis
@@ -9,27 +10,65 @@ _redis: Redis | None = None
 async def get_redis() -> Redis:
     global _redis
     if _redis is None:
-        _redis = Redis.from_url(settings.redis_url, decode_responses=True)
+        # Respostas em bytes: os consumidores fazem json/orjson.loads direto, sem decode UTF-8 intermediário
+        _redis = Redis.from_url(
+            settings.redis_url,
+            decode_responses=False,
+            max_connections=64,
+            health_check_interval=30,
+            socket_keepalive=True,
+        )
     return _redis
 
 
+# Último PING bem-sucedido (relógio monotônico); falhas não são cacheadas
+_HEALTH_TTL_SECONDS = 1.0
+_last_ping_ok: float | None = None
+
+
 async def check_redis_connection() -> bool:
+    global _last_ping_ok
+    if _last_ping_ok is not None and time.monotonic() - _last_ping_ok < _HEALTH_TTL_SECONDS:
+        return True
     try:
         r = await get_redis()
-        return bool(await r.ping())
+        ok = bool(await r.ping())
     except Exception:
-        return False
+        ok = False
+    _last_ping_ok = time.monotonic() if ok else None
+    return ok
+
+
+async def unlink_keys(keys: list[bytes], *, batch_size: int = 100) -> int:
+    """
+    Remove as chaves informadas em lotes com UNLINK (um round-trip por lote; a
+    liberação de memória fica fora da thread principal do Redis).
+    """
+    redis = await get_redis()
+    removed = 0
+    for i in range(0, len(keys), batch_size):
+        try:
+            removed += await redis.unlink(*keys[i:i + batch_size])
+        except Exception:
+            # ignora falha isolada do lote e continua
+            pass
+    return removed
 
 
 async def cleanup_cache_keys(patterns: Iterable[str], *, batch_size: int = 100) -> int:
-    """Remove chaves de cache que correspondam aos padrões informados."""
+    """
+    Remove chaves de cache que correspondam aos padrões informados.
+    Chaves são removidas em lotes com UNLINK via ``unlink_keys``.
+    """
     redis = await get_redis()
     removed = 0
     for pattern in patterns:
+        buf: list[bytes] = []
         async for key in redis.scan_iter(match=pattern, count=batch_size):
-            try:
-                removed += await redis.delete(key)
-            except Exception:
-                # ignora falha isolada e continua
-                continue
+            buf.append(key)
+            if len(buf) >= batch_size:
+                removed += await unlink_keys(buf, batch_size=batch_size)
+                buf = []
+        if buf:
+            removed += await unlink_keys(buf, batch_size=batch_size)
     return removed
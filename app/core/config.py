@@ -18,11 +18,14 @@ class Settings(BaseSettings):
     retention_days_macro: int = Field(default=365, alias="RETENTION_DAYS_MACRO")
     retention_days_ohlcv: int = Field(default=730, alias="RETENTION_DAYS_OHLCV")
     retention_days_api_calls: int = Field(default=14, alias="RETENTION_DAYS_API_CALLS")
+    # Orçamento por recurso da brapi: {"quote": [3, 1.0]} = 3 requisições por segundo (JSON em RATE_LIMITS)
+    rate_limits: dict[str, tuple[int, float]] = Field(default_factory=dict, alias="RATE_LIMITS")
 
     class Config:
         env_file = ".env"
         extra = "ignore"
 
+# Lido uma vez no import; os serviços copiam os TTLs de cache para constantes de módulo
 settings = Settings()
 
 PLAN_FREE = settings.plan_free
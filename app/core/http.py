@@ -2,15 +2,25 @@
 from __future__ import annotations
 
 import asyncio
+import random
+import threading
 from typing import Optional
 
 import httpx
 from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
 _client: Optional[httpx.AsyncClient] = None
-_client_lock = asyncio.Lock()
+_client_lock = threading.Lock()
 
-DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+# Timeouts explícitos por fase; pool curto para falhar rápido se o pool esgotar
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=10.0, write=5.0, pool=2.0)
+# Praticamente todo o tráfego vai para um único host (brapi.dev) e o HTTP/2
+# multiplexa o fan-out em poucas conexões: teto menor, mais conexões ociosas mantidas
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=64, keepalive_expiry=30.0)
+
+
+_RETRY_STATUS: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+_RETRY_INITIAL_WAIT = 0.5
 
 
 class RetryableHTTPStatusError(httpx.HTTPStatusError):
@@ -18,36 +28,56 @@ class RetryableHTTPStatusError(httpx.HTTPStatusError):
 
 
 async def send_request_with_retry(client: httpx.AsyncClient, request: httpx.Request, *, max_attempts: int = 4) -> httpx.Response:
+    # Caminho rápido: a primeira tentativa não passa pelo tenacity
+    try:
+        response = await client.send(request)
+    except httpx.TransportError:
+        if max_attempts <= 1:
+            raise
+    else:
+        if response.status_code not in _RETRY_STATUS:
+            response.raise_for_status()
+            return response
+        if max_attempts <= 1:
+            raise RetryableHTTPStatusError("Retryable status", request=request, response=response)
+
+    # Falhou: mesmo backoff de antes entre a 1ª e a 2ª tentativa (espera inicial + jitter
+    # de até 1s, como o wait_exponential_jitter do tenacity), depois o laço do tenacity
+    await asyncio.sleep(_RETRY_INITIAL_WAIT + random.uniform(0, 1))
     async for attempt in AsyncRetrying(
-        stop=stop_after_attempt(max_attempts),
+        stop=stop_after_attempt(max_attempts - 1),
         retry=retry_if_exception_type((httpx.TransportError, RetryableHTTPStatusError)),
-        wait=wait_exponential_jitter(initial=0.5, max=5.0, exp_base=2),
+        wait=wait_exponential_jitter(initial=_RETRY_INITIAL_WAIT * 2, max=5.0, exp_base=2),
         reraise=True,
     ):
         with attempt:
             response = await client.send(request)
-            if response.status_code in {429, 500, 502, 503, 504}:
+            if response.status_code in _RETRY_STATUS:
                 raise RetryableHTTPStatusError("Retryable status", request=request, response=response)
             response.raise_for_status()
             return response
     raise RuntimeError("retry loop exhausted")
 
 
-async def get_async_client() -> httpx.AsyncClient:
-    """Return a shared AsyncClient instance with retry helper attached."""
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use.
+
+    Construction is synchronous, so a plain lock on the cold path is enough
+    and the hot path is a single global read with no await.
+    """
     global _client
     if _client is not None:
         return _client
 
-    async with _client_lock:
+    with _client_lock:
         if _client is None:
-            _client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT)
+            _client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS, http2=True)
         return _client
 
 
 async def close_async_client() -> None:
     global _client
-    async with _client_lock:
-        if _client is not None:
-            await _client.aclose()
-            _client = None
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        await client.aclose()
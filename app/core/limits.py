@@ -1,16 +1,66 @@
 """Async rate limiting helpers."""
 from __future__ import annotations
 
-from typing import Dict
+import asyncio
+import time
+from typing import Dict, Optional
 
-from aiolimiter import AsyncLimiter
+from app.core.config import settings
 
-_DEFAULT_LIMITS: Dict[str, AsyncLimiter] = {}
+# default budget ~3 req/s to stay safe on brapi free tier
+DEFAULT_RATE = 3
+DEFAULT_PERIOD = 1.0
 
 
-def get_limiter(resource: str) -> AsyncLimiter:
-    """Return (and cache) a limiter for given resource name."""
-    if resource not in _DEFAULT_LIMITS:
-        # default budget ~3 req/s with burst of 1 to stay safe on brapi free tier
-        _DEFAULT_LIMITS[resource] = AsyncLimiter(max_rate=3, time_period=1)
-    return _DEFAULT_LIMITS[resource]
+class TokenBucket:
+    """Token bucket no relógio monotônico, usado como ``async with limiter:``.
+
+    Aguardantes fazem fila num ``asyncio.Lock`` (FIFO): só o primeiro da fila
+    dorme até o próximo token, sem acordar todos a cada reposição.
+    """
+
+    def __init__(self, rate: int, period: float = 1.0, burst: Optional[int] = None) -> None:
+        if rate <= 0 or period <= 0:
+            raise ValueError("rate e period devem ser positivos")
+        self.capacity = float(burst if burst is not None else rate)
+        self._fill_rate = rate / period
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self._fill_rate)
+        self._last = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self._fill_rate)
+                self._refill()
+            self._tokens -= 1.0
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+
+_DEFAULT_LIMITS: Dict[str, TokenBucket] = {}
+
+
+def get_limiter(resource: str, rate: Optional[int] = None, period: Optional[float] = None) -> TokenBucket:
+    """Return (and cache) a limiter for given resource name.
+
+    Budget comes from ``rate``/``period`` when given, else from
+    ``settings.rate_limits[resource]``, else the default (3 req/s).
+    Overrides only apply when the limiter is first created.
+    """
+    limiter = _DEFAULT_LIMITS.get(resource)
+    if limiter is None:
+        cfg_rate, cfg_period = settings.rate_limits.get(resource, (DEFAULT_RATE, DEFAULT_PERIOD))
+        limiter = TokenBucket(rate or cfg_rate, period or cfg_period)
+        _DEFAULT_LIMITS[resource] = limiter
+    return limiter
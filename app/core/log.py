@@ -0,0 +1,26 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_LISTENER: QueueListener | None = None
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """
+    Configura o logging raiz com QueueHandler: o handler de saída roda em uma
+    thread própria (QueueListener), então logar não bloqueia o event loop.
+    Idempotente.
+    """
+    global _LISTENER
+    if _LISTENER is not None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    _LISTENER = QueueListener(log_queue, stream, respect_handler_level=True)
+    _LISTENER.start()
+    atexit.register(_LISTENER.stop)
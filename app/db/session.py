@@ -1,14 +1,32 @@
+import time
+import orjson
 from typing import AsyncGenerator
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy import text
+from redis.exceptions import RedisError
 from app.core.config import settings
+from app.core.cache import get_redis
+from app.services.utils.json_serializer import orjson_column_serializer
 
-engine: AsyncEngine = create_async_engine(settings.database_url, pool_pre_ping=True)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# Pool dimensionado para handlers concorrentes; LIFO reaproveita as conexões mais quentes
+# e deixa as ociosas expirarem (pool_recycle abaixo do wait_timeout do MySQL)
+engine: AsyncEngine = create_async_engine(
+    settings.database_url,
+    pool_pre_ping=True,
+    pool_size=20,
+    max_overflow=10,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+    # Colunas JSON (ApiCall.response, raw, ...) serializadas/lidas com orjson
+    json_serializer=orjson_column_serializer,
+    json_deserializer=orjson.loads,
+)
+AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    # A sessão só retira conexão do pool no primeiro execute(): rotas que
+    # respondem do cache (Redis/memória) não ocupam conexão.
     async with AsyncSessionLocal() as session:
         yield session
 
@@ -16,10 +34,41 @@ async def create_all() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
+# Marca "schema já verificado": com N workers, só o primeiro roda o create_all
+_SCHEMA_LOCK_KEY = "brapi:create_all:lock"
+_SCHEMA_READY_KEY = "brapi:create_all:done"
+_SCHEMA_READY_TTL_SECONDS = 300
+
+async def create_all_once() -> None:
+    """
+    ``create_all`` coordenado via Redis: um worker executa, os demais aguardam
+    o lock e pulam ao encontrar a marca. Sem Redis, executa localmente.
+    """
+    try:
+        r = await get_redis()
+        async with r.lock(_SCHEMA_LOCK_KEY, timeout=60, blocking_timeout=60):
+            if await r.exists(_SCHEMA_READY_KEY):
+                return
+            await create_all()
+            await r.set(_SCHEMA_READY_KEY, "1", ex=_SCHEMA_READY_TTL_SECONDS)
+    except RedisError:
+        # Redis indisponível ou lock expirado: create_all é idempotente
+        await create_all()
+
+# Último SELECT 1 bem-sucedido (relógio monotônico): /health consultado a 1+ Hz
+# não faz checkout do pool a cada chamada
+_HEALTH_TTL_SECONDS = 1.0
+_last_db_ok: float | None = None
+
 async def check_db() -> bool:
+    global _last_db_ok
+    if _last_db_ok is not None and time.monotonic() - _last_db_ok < _HEALTH_TTL_SECONDS:
+        return True
     try:
         async with engine.connect() as conn:
             await conn.execute(text("SELECT 1"))
+        _last_db_ok = time.monotonic()
         return True
     except Exception:
+        _last_db_ok = None
         return False
@@ -1,7 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
 import asyncio
-from app.db.session import create_all, check_db
+import logging
+from tenacity import AsyncRetrying, RetryError, retry_if_result, stop_after_delay, wait_exponential_jitter
+from app.db.session import create_all_once, check_db
 from app.core.cache import check_redis_connection
+from app.core.http import close_async_client
+from app.core.log import setup_logging
+from app.core.responses import ORJSONResponse
+from app.services._quote_cache import cache_stats
+from app.services._api_call_log import start_api_call_log, stop_api_call_log
 from app.api.routes.quote import router as quote_router
 from app.api.routes.crypto import router as crypto_router
 from app.api.routes.currency import router as currency_router
@@ -11,33 +19,73 @@ from app.api.routes.history import router as history_router
 from app.api.routes.prime_rate_scan import router as prime_rate_scan_router
 from app.api.routes.catalog import router as catalog_router
 from app.api.routes.ohlcv import router as ohlcv_router
-app = FastAPI(title="brapi Boilerplate (SQLModel + SDK + Cache)")
+logger = logging.getLogger(__name__)
 
-async def wait_for(predicate, name: str, attempts: int = 90, delay: int = 2):
-    for _ in range(attempts):
-        if await predicate():
-            return True
-        await asyncio.sleep(delay)
-    raise RuntimeError(f"{name} não ficou pronto após {attempts * delay}s")
+app = FastAPI(
+    title="brapi Boilerplate (SQLModel + SDK + Cache)",
+    default_response_class=ORJSONResponse,
+)
+
+# Séries OHLCV/históricas são grandes e numéricas: comprime acima de 1 KB
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    # Erros inesperados: um único ponto de log e resposta 500 genérica
+    logger.exception("Erro não tratado em %s %s", request.method, request.url.path)
+    return ORJSONResponse({"detail": "Erro interno do servidor"}, status_code=500)
+
+async def wait_for(predicate, name: str, timeout: float = 180.0):
+    # Backoff exponencial com jitter: dependências já saudáveis respondem na
+    # primeira tentativa; as lentas são consultadas no máximo a cada 2s
+    retrying = AsyncRetrying(
+        stop=stop_after_delay(timeout),
+        wait=wait_exponential_jitter(initial=0.1, max=2.0, jitter=0.1),
+        retry=retry_if_result(lambda ok: not ok),
+    )
+    try:
+        await retrying(predicate)
+    except RetryError:
+        raise RuntimeError(f"{name} não ficou pronto após {timeout:g}s") from None
+    return True
 
 @app.on_event("startup")
 async def on_startup():
-    await wait_for(check_db, "MySQL")
-    await create_all()
-    await wait_for(check_redis_connection, "Redis")
-
-app.include_router(quote_router)
-app.include_router(crypto_router)
-app.include_router(currency_router)
-app.include_router(macro_router)
-app.include_router(available_router)
-app.include_router(history_router)
-app.include_router(prime_rate_scan_router)
-app.include_router(catalog_router)
-app.include_router(ohlcv_router)
+    setup_logging()
+    # MySQL e Redis são independentes: aguarda os dois em paralelo
+    await asyncio.gather(
+        wait_for(check_db, "MySQL"),
+        wait_for(check_redis_connection, "Redis"),
+    )
+    await create_all_once()
+    start_api_call_log()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_api_call_log()
+    await close_async_client()
+
+# Ponto único de registro: dependências comuns a todas as rotas entram aqui
+ROUTERS = (
+    quote_router,
+    crypto_router,
+    currency_router,
+    macro_router,
+    available_router,
+    history_router,
+    prime_rate_scan_router,
+    catalog_router,
+    ohlcv_router,
+)
+for router in ROUTERS:
+    app.include_router(router)
 
 @app.get("/health")
 async def health():
     db_ok = await check_db()
     redis_ok = await check_redis_connection()
     return {"db": "ok" if db_ok else "down", "redis": "ok" if redis_ok else "down"}
+
+@app.get("/api/cache_stats")
+async def get_cache_stats():
+    return cache_stats()
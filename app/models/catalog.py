@@ -26,6 +26,12 @@ class Asset(SQLModel, table=True):
     created_at: datetime = Field(default_factory=utcnow, index=True)
     updated_at: datetime = Field(default_factory=utcnow, index=True)
 
+    __table_args__ = (
+        # Listagem filtrada por tipo/setor já ordenada por nome (evita filesort)
+        Index("ix_assets_type_sector_name", "type", "sector", "name"),
+        Index("ix_assets_type_name", "type", "name"),
+    )
+
 class QuoteOHLCV(SQLModel, table=True):
     """
     Séries históricas de preços OHLCV.
@@ -0,0 +1,89 @@
+"""
+Gravação de ``ApiCall`` fora do caminho crítico das requisições.
+
+Os registros entram em uma fila em memória e uma task de background os insere
+em lote (Core ``insert``, sem unit of work) a cada ~100 ms ou 500 linhas.
+Sem a task rodando (scripts, testes), ``enqueue_api_call`` devolve ``False``
+e o chamador grava de forma síncrona como antes.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+from sqlalchemy import insert
+
+from app.db.session import AsyncSessionLocal
+from app.models import ApiCall
+
+logger = logging.getLogger(__name__)
+
+_MAX_QUEUE = 10_000
+_MAX_BATCH = 500
+_FLUSH_INTERVAL_SECONDS = 0.1
+
+_log_queue: Optional[asyncio.Queue[dict[str, Any]]] = None
+_drain_task: Optional[asyncio.Task[None]] = None
+
+
+def enqueue_api_call(record: ApiCall) -> bool:
+    """Enfileira o registro; ``False`` se a task não está ativa ou a fila está cheia."""
+    if _log_queue is None or _drain_task is None or _drain_task.done():
+        return False
+    try:
+        _log_queue.put_nowait(record.model_dump(exclude={"id"}))
+        return True
+    except asyncio.QueueFull:
+        return False
+
+
+async def _flush(rows: list[dict[str, Any]]) -> None:
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(ApiCall.__table__), rows)
+            await session.commit()
+    except Exception:
+        # Log de chamadas é best effort: não derruba a task
+        logger.exception("Falha ao gravar %d registros de ApiCall", len(rows))
+
+
+async def _drain_log_queue(queue: asyncio.Queue[dict[str, Any]]) -> None:
+    while True:
+        rows = [await queue.get()]
+        deadline = asyncio.get_running_loop().time() + _FLUSH_INTERVAL_SECONDS
+        while len(rows) < _MAX_BATCH:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                rows.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        await _flush(rows)
+
+
+def start_api_call_log() -> None:
+    """Inicia a task de gravação em lote (chamado no startup da API)."""
+    global _log_queue, _drain_task
+    if _drain_task is not None and not _drain_task.done():
+        return
+    _log_queue = asyncio.Queue(maxsize=_MAX_QUEUE)
+    _drain_task = asyncio.create_task(_drain_log_queue(_log_queue))
+
+
+async def stop_api_call_log() -> None:
+    """Para a task e grava o que ainda estiver na fila (shutdown da API)."""
+    global _log_queue, _drain_task
+    queue, task = _log_queue, _drain_task
+    _log_queue, _drain_task = None, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    if queue is not None:
+        rows = [queue.get_nowait() for _ in range(queue.qsize())]
+        for i in range(0, len(rows), _MAX_BATCH):
+            await _flush(rows[i:i + _MAX_BATCH])
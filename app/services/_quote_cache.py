@@ -0,0 +1,58 @@
+"""
+Cache em processo, de vida curta, na frente do Redis para cotações de alta
+frequência (/api/crypto e /api/currency) e para a listagem /api/available.
+Requisições idênticas dentro do TTL não pagam ida ao Redis nem decodificação JSON.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+QUOTE_CACHE_TTL_SECONDS = 2.0
+QUOTE_CACHE_MAXSIZE = 4096
+# Listagem /available muda no máximo diariamente; 1h limita a defasagem em relação ao Redis
+AVAILABLE_CACHE_TTL_SECONDS = 3600.0
+
+
+class TTLCache:
+    """LRU com expiração por entrada. Uso restrito ao event loop (sem lock)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "ttl_seconds": self.ttl}
+
+
+crypto_cache = TTLCache(QUOTE_CACHE_MAXSIZE, QUOTE_CACHE_TTL_SECONDS)
+currency_cache = TTLCache(QUOTE_CACHE_MAXSIZE, QUOTE_CACHE_TTL_SECONDS)
+available_cache = TTLCache(1, AVAILABLE_CACHE_TTL_SECONDS)
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    return {"crypto": crypto_cache.stats(), "currency": currency_cache.stats(), "available": available_cache.stats()}
@@ -1,55 +1,111 @@
 from typing import Any, Dict, Iterable
 
-import json
+import asyncio
 import httpx
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.cache import get_redis
+from app.core.config import settings
 from app.services.brapi_client import BrapiClient
-from app.services.utils.json_serializer import json_serializer, normalize_for_json
 from app.services.utils.key import make_cache_key
 from app.models import ApiCall
+from app.services._api_call_log import enqueue_api_call
+from app.services._quote_cache import available_cache
 
 
-AVAILABLE_TTL_SECONDS = 86400
+AVAILABLE_TTL_SECONDS = settings.cache_ttl_macro_seconds
+
+
+# (chave de saída, chaves de origem em ordem de preferência)
+_MERGE_SPECS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("stocks", ("stocks",)),
+    ("indexes", ("indexes",)),
+    ("availableSectors", ("availableSectors", "stock_sectors")),
+    ("availableStockTypes", ("availableStockTypes", "stock_types")),
+    ("currencies", ("currencies",)),
+    ("coins", ("coins",)),
+    ("inflation_countries", ("inflation_countries",)),
+    ("prime_rate_countries", ("prime_rate_countries",)),
+)
+
+
+def _sorted_unique(items: Iterable[Any]) -> list[str]:
+    items = list(items)
+    # A brapi costuma devolver listas já ordenadas e sem duplicatas: uma
+    # passada linear confirma isso e evita montar o set e reordenar
+    prev = ""
+    for s in items:
+        if not isinstance(s, str) or s <= prev or s != s.strip():
+            break
+        prev = s
+    else:
+        return items
+    # strip uma única vez por item; vazios e não-strings descartados
+    return sorted({s for s in (v.strip() for v in items if isinstance(v, str)) if s})
 
 
 def _merge_available_payloads(data: Dict[str, Any]) -> Dict[str, Any]:
     """Normaliza o payload de disponibilidade agrupando por domínio."""
-    def _unique(items: Iterable[Any]) -> list[str]:
-        uniq = {str(item).strip() for item in items if isinstance(item, str) and str(item).strip()}
-        return sorted(uniq)
-
-    return {
-        "stocks": _unique(data.get("stocks") or []),
-        "indexes": _unique(data.get("indexes") or []),
-        "availableSectors": _unique(data.get("availableSectors") or data.get("stock_sectors") or []),
-        "availableStockTypes": _unique(data.get("availableStockTypes") or data.get("stock_types") or []),
-        "currencies": _unique(data.get("currencies") or []),
-        "coins": _unique(data.get("coins") or []),
-        "inflation_countries": _unique(data.get("inflation_countries") or []),
-        "prime_rate_countries": _unique(data.get("prime_rate_countries") or []),
-    }
+    merged: Dict[str, Any] = {}
+    for out_key, sources in _MERGE_SPECS:
+        items: Iterable[Any] = next((data[k] for k in sources if data.get(k)), ())
+        merged[out_key] = _sorted_unique(items)
+    return merged
+
+
+# Uma única busca upstream por vez: concorrentes aguardam e leem o cache em processo
+_AVAILABLE_LOCK = asyncio.Lock()
+
+
+async def _cached_locally(session: AsyncSession) -> dict[str, Any] | None:
+    hot = available_cache.get("all")
+    if hot is None:
+        return None
+    await _log_call(session, cached=True, status_code=200, response=hot)
+    return {"cached": True, "results": hot}
 
 
 async def get_available(session: AsyncSession) -> dict[str, Any]:
+    # Cache em processo antes do Redis
+    hit = await _cached_locally(session)
+    if hit is not None:
+        return hit
+    async with _AVAILABLE_LOCK:
+        hit = await _cached_locally(session)
+        if hit is not None:
+            return hit
+        return await _load_available(session)
+
+
+async def _load_available(session: AsyncSession) -> dict[str, Any]:
     redis = await get_redis()
     key = make_cache_key("available", "all", {})
 
     cached = await redis.get(key)
     if cached:
-        payload = json.loads(cached)
+        payload = orjson.loads(cached)
+        available_cache.set("all", payload)
         await _log_call(session, cached=True, status_code=200, response=payload)
         return {"cached": True, "results": payload}
 
     client = BrapiClient()
 
+    # As cinco listagens são independentes: em paralelo, latência ~ da mais lenta
+    # (o limiter por recurso em BrapiClient continua valendo)
+    results = await asyncio.gather(
+        client.quote_list(),
+        client.currency_available(),
+        client.crypto_available(),
+        client.inflation_available(),
+        client.prime_rate_available(),
+        return_exceptions=True,
+    )
     try:
-        stocks_payload = await client.quote_list()
-        currencies_payload = await client.currency_available()
-        crypto_payload = await client.crypto_available()
-        inflation_payload = await client.inflation_available()
-        prime_payload = await client.prime_rate_available()
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        stocks_payload, currencies_payload, crypto_payload, inflation_payload, prime_payload = results
     except ValueError as e:
         message = str(e) or "Token brapi ausente para endpoints /available"
         await _log_call(session, cached=False, status_code=401, response={"message": message})
@@ -97,7 +153,8 @@ async def get_available(session: AsyncSession) -> dict[str, Any]:
 
     normalized = _merge_available_payloads(merged)
 
-    await redis.set(key, json.dumps(normalized, separators=(",", ":"), default=json_serializer), ex=AVAILABLE_TTL_SECONDS)
+    await redis.set(key, orjson.dumps(normalized), ex=AVAILABLE_TTL_SECONDS)
+    available_cache.set("all", normalized)
     await _log_call(session, cached=False, status_code=200, response=normalized)
     return {"cached": False, "results": normalized}
 
@@ -115,7 +172,11 @@ async def _log_call(
         params=None,
         cached=cached,
         status_code=status_code,
-        response=normalize_for_json(response) if response else None,
+        # datetimes e afins ficam para o json_serializer (orjson) do engine
+        response=response or None,
     )
+    # Gravação em lote em background; sem a task ativa, grava na hora
+    if enqueue_api_call(record):
+        return
     session.add(record)
     await session.commit()
@@ -1,19 +1,44 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Dict, Iterable, List
 
-from httpx import Request
+import orjson
 
 from app.core.config import PLAN_FREE, settings
 from app.core.http import get_async_client, send_request_with_retry
 from app.core.limits import get_limiter
 
+# Caminhos v2 fixos, resolvidos no import
+_PATH_CRYPTO = "/api/v2/crypto"
+_PATH_CURRENCY = "/api/v2/currency"
+_PATH_INFLATION = "/api/v2/inflation"
+_PATH_PRIME_RATE = "/api/v2/prime-rate"
+_PATH_CURRENCY_AVAILABLE = "/api/v2/currency/available"
+_PATH_CRYPTO_AVAILABLE = "/api/v2/crypto/available"
+_PATH_INFLATION_AVAILABLE = "/api/v2/inflation/available"
+_PATH_PRIME_RATE_AVAILABLE = "/api/v2/prime-rate/available"
+
+# Booleanos como a brapi espera na query string (None = não enviar)
+_BOOL_PARAM = {True: "true", False: "false"}
+# Parâmetros que o plano free não aceita
+_MODULE_PARAMS = frozenset({"fundamental", "modules"})
+
+_PREFERRED_META_KEYS = ("requestedAt", "usedRange", "usedInterval", "fromCache", "took")
+
+# Requisições simultâneas por chamada a quote() no plano free (um ticker por requisição)
+_FREE_PLAN_CONCURRENCY = 16
+
 
 class BrapiClient:
     def __init__(self, api_key: str | None = None):
         self.api_key = api_key or settings.brapi_token
         self.base_url = settings.brapi_base_url.rstrip("/")
         self.plan_free = PLAN_FREE
+        # Decisão do plano padrão resolvida uma vez; quote() só recalcula com plan explícito
+        self._default_is_free = bool(self.plan_free)
+        # Headers montados uma vez por cliente (httpx copia o dict em cada Request)
+        self._cached_headers = self._build_headers(self.api_key)
 
     @staticmethod
     def _v2_path(*segments: str) -> str:
@@ -31,34 +56,36 @@ class BrapiClient:
         modules: List[str] | None,
         allow_modules: bool,
     ) -> dict[str, Any]:
-        params = dict(base or {})
-        if range is not None:
-            params["range"] = range
-        if interval is not None:
-            params["interval"] = interval
-        if dividends is True:
-            params["dividends"] = "true"
-        elif dividends is False:
-            params["dividends"] = "false"
-        fundamental_flag = None
-        if fundamental is True:
-            fundamental_flag = "true"
-        elif fundamental is False:
-            fundamental_flag = "false"
-        if fundamental_flag and allow_modules:
-            params["fundamental"] = fundamental_flag
-        if modules and allow_modules:
-            params["modules"] = ",".join(modules)
+        if allow_modules or not base:
+            params = dict(base or {})
+        else:
+            # Plano free: fundamental/modules vindos de ``base`` já ficam de fora da cópia
+            params = {k: v for k, v in base.items() if k not in _MODULE_PARAMS}
+        params.update({
+            k: v
+            for k, v in (
+                ("range", range),
+                ("interval", interval),
+                ("dividends", _BOOL_PARAM.get(dividends)),
+                ("fundamental", _BOOL_PARAM.get(fundamental) if allow_modules else None),
+                ("modules", ",".join(modules) if modules and allow_modules else None),
+            )
+            if v is not None
+        })
         return params
 
-    def _headers(self) -> dict[str, str]:
+    @staticmethod
+    def _build_headers(api_key: str | None) -> dict[str, str]:
         headers: dict[str, str] = {}
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
         headers.setdefault("Accept", "application/json")
         headers.setdefault("Accept-Encoding", "gzip, deflate")
         return headers
 
+    def _headers(self) -> dict[str, str]:
+        return self._cached_headers
+
     async def _request_json(
         self,
         path: str,
@@ -69,12 +96,15 @@ class BrapiClient:
     ) -> dict[str, Any]:
         if require_token and not self.api_key:
             raise ValueError("BRAPI_TOKEN não configurado para este endpoint.")
-        client = await get_async_client()
+        client = get_async_client()
         limiter = get_limiter(resource)
-        request = Request("GET", f"{self.base_url}{path}", params=params, headers=self._headers())
+        # build_request do cliente compartilhado: mescla headers/timeout do pool;
+        # sem base_url no cliente (atende outros hosts), a URL vai completa
+        request = client.build_request("GET", f"{self.base_url}{path}", params=params, headers=self._headers())
         async with limiter:
             response = await send_request_with_retry(client, request)
-        return response.json()
+        # orjson lê os bytes direto, sem decodificar para str antes
+        return orjson.loads(response.content)
 
     async def _fetch_quote(self, ticker: str, params: dict[str, Any]) -> dict[str, Any]:
         return await self._request_json(
@@ -103,15 +133,12 @@ class BrapiClient:
         modules: List[str] | None = None,
         plan: str | None = None,
     ) -> dict[str, Any]:
-        tickers_list = [t.strip().upper() for t in tickers if t and t.strip()]
+        # Um strip por ticker; duplicados removidos preservando a ordem (menos requisições/URL menor)
+        tickers_list = list(dict.fromkeys(s for s in (t.strip().upper() for t in tickers if t) if s))
         if not tickers_list:
             return {"results": []}
 
-        plan_normalized = plan.lower() if isinstance(plan, str) else None
-        if plan_normalized is None:
-            is_free_plan = self.plan_free
-        else:
-            is_free_plan = plan_normalized == "free"
+        is_free_plan = plan.lower() == "free" if isinstance(plan, str) else self._default_is_free
 
         effective_params = self._build_params(
             params,
@@ -123,35 +150,44 @@ class BrapiClient:
             allow_modules=not is_free_plan,
         )
 
-        if is_free_plan:
-            effective_params.pop("fundamental", None)
-            effective_params.pop("modules", None)
-
         responses: List[dict[str, Any]] = []
         if not is_free_plan and len(tickers_list) > 1:
             responses.append(await self._fetch_quote_batch(tickers_list, effective_params))
+        elif len(tickers_list) == 1:
+            responses.append(await self._fetch_quote(tickers_list[0], effective_params))
         else:
-            for ticker in tickers_list:
-                responses.append(await self._fetch_quote(ticker, effective_params))
+            # Plano free: um ticker por requisição, disparadas em paralelo (limitadas pelo
+            # semáforo; o limiter "quote" em _request_json continua ditando o ritmo)
+            semaphore = asyncio.Semaphore(_FREE_PLAN_CONCURRENCY)
+
+            async def _one(ticker: str) -> dict[str, Any]:
+                async with semaphore:
+                    return await self._fetch_quote(ticker, effective_params)
+
+            responses.extend(await asyncio.gather(*(_one(t) for t in tickers_list)))
 
         if len(responses) == 1:
             return responses[0]
 
         merged: List[dict[str, Any]] = []
+        merged_extend = merged.extend
         aggregated: dict[str, Any] = {"results": merged}
-        preferred_meta_keys = ("requestedAt", "usedRange", "usedInterval", "fromCache", "took")
         for payload in responses:
-            stocks = (payload or {}).get("results") or (payload or {}).get("stocks") or []
-            merged.extend(stocks)
-            for key in preferred_meta_keys:
-                if key in payload and key not in aggregated:
-                    aggregated[key] = payload[key]
+            if not payload:
+                continue
+            stocks = payload.get("results") or payload.get("stocks")
+            if stocks:
+                merged_extend(stocks)
+            # metadados: vale o do primeiro payload que os trouxer
+            for key in _PREFERRED_META_KEYS:
+                if key in payload:
+                    aggregated.setdefault(key, payload[key])
         return aggregated
 
     async def crypto(self, coins: list[str], currency: str) -> dict:
         params = {"coin": ",".join(coins), "currency": currency}
         return await self._request_json(
-            self._v2_path("crypto"),
+            _PATH_CRYPTO,
             params=params,
             resource="crypto",
             require_token=True,
@@ -160,7 +196,7 @@ class BrapiClient:
     async def currency(self, pairs: list[str]) -> dict:
         params = {"currency": ",".join(pairs)}
         return await self._request_json(
-            self._v2_path("currency"),
+            _PATH_CURRENCY,
             params=params,
             resource="currency",
         )
@@ -168,7 +204,7 @@ class BrapiClient:
     async def inflation(self, country: str) -> dict:
         params = {"country": country}
         return await self._request_json(
-            self._v2_path("inflation"),
+            _PATH_INFLATION,
             params=params,
             resource="macro",
         )
@@ -176,7 +212,7 @@ class BrapiClient:
     async def prime_rate(self, country: str) -> dict:
         params = {"country": country}
         return await self._request_json(
-            self._v2_path("prime-rate"),
+            _PATH_PRIME_RATE,
             params=params,
             resource="macro",
         )
@@ -186,7 +222,7 @@ class BrapiClient:
         if search:
             params["search"] = search
         return await self._request_json(
-            self._v2_path("currency", "available"),
+            _PATH_CURRENCY_AVAILABLE,
             params=params,
             resource="currency_available",
             require_token=True,
@@ -197,7 +233,7 @@ class BrapiClient:
         if search:
             params["search"] = search
         return await self._request_json(
-            self._v2_path("crypto", "available"),
+            _PATH_CRYPTO_AVAILABLE,
             params=params,
             resource="crypto_available",
             require_token=True,
@@ -208,7 +244,7 @@ class BrapiClient:
         if search:
             params["search"] = search
         return await self._request_json(
-            self._v2_path("inflation", "available"),
+            _PATH_INFLATION_AVAILABLE,
             params=params,
             resource="inflation_available",
             require_token=True,
@@ -219,7 +255,7 @@ class BrapiClient:
         if search:
             params["search"] = search
         return await self._request_json(
-            self._v2_path("prime-rate", "available"),
+            _PATH_PRIME_RATE_AVAILABLE,
             params=params,
             resource="prime_rate_available",
             require_token=True,
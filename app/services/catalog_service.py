@@ -1,22 +1,65 @@
 from typing import Any, List, Optional, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, update, and_, or_, func
-from sqlalchemy import desc
+from sqlalchemy import desc, false
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import SQLAlchemyError
+from redis.exceptions import RedisError
 from app.core.cache import get_redis
 from app.core.config import settings
+from app.db.session import AsyncSessionLocal
 from app.services.brapi_client import BrapiClient
 from app.services.utils.key import make_cache_key
 from app.services.utils.json_serializer import json_serializer, normalize_for_json
 from app.models import ApiCall, Asset
+from app.services._api_call_log import enqueue_api_call
 from datetime import datetime, timezone
 import json
+import logging
+import orjson
+import base64
 import asyncio
 import random
+import time
 from brapi import NotFoundError
 
+logger = logging.getLogger(__name__)
+
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
+
+# Mapeamento de tipos (singular e plural)
+_ASSET_TYPE_MAP = {
+    "stock": "stock",
+    "ação": "stock",
+    "acao": "stock",
+    "ações": "stock",
+    "acoes": "stock",
+    "fund": "fund",
+    "fundo": "fund",
+    "fundos": "fund",
+    "fii": "fund",
+    "bdr": "bdr",
+    "etf": "etf",
+    "index": "index",
+    "índice": "index",
+    "indice": "index",
+}
+
+# Campos do /quote guardados em Asset.raw no enriquecimento
+_ESSENTIAL_FIELDS = frozenset({
+    "currency", "marketCap", "shortName", "longName",
+    "regularMarketChange", "regularMarketChangePercent",
+    "regularMarketTime", "regularMarketPrice",
+    "regularMarketDayHigh", "regularMarketDayRange",
+    "regularMarketDayLow", "regularMarketVolume",
+    "regularMarketPreviousClose", "regularMarketOpen",
+    "fiftyTwoWeekRange", "fiftyTwoWeekLow", "fiftyTwoWeekHigh",
+    "symbol", "logourl", "priceEarnings", "earningsPerShare",
+})
+
+
 def _normalize_asset_type(asset_type: Optional[str]) -> Optional[str]:
     """Normaliza o tipo do ativo para valores padrão."""
     if not asset_type:
@@ -28,25 +71,7 @@ def _normalize_asset_type(asset_type: Optional[str]) -> Optional[str]:
     if not type_lower:
         return None
     
-    # Mapeamento de tipos (singular e plural)
-    type_mapping = {
-        "stock": "stock",
-        "ação": "stock",
-        "acao": "stock",
-        "ações": "stock",
-        "acoes": "stock",
-        "fund": "fund",
-        "fundo": "fund",
-        "fundos": "fund",
-        "fii": "fund",
-        "bdr": "bdr",
-        "etf": "etf",
-        "index": "index",
-        "índice": "index",
-        "indice": "index",
-    }
-    
-    return type_mapping.get(type_lower, type_lower)
+    return _ASSET_TYPE_MAP.get(type_lower, type_lower)
 
 def _has_value(value: Any) -> bool:
     if value is None:
@@ -111,34 +136,40 @@ def _needs_enrichment(asset: Asset) -> bool:
         return True
     return False
 
-async def _enrich_asset(asset: Asset, client: BrapiClient) -> None:
-    """Busca detalhes adicionais do ativo via endpoint /quote com retry resiliente (Stage 4)."""
-    if not _needs_enrichment(asset):
-        return
+# Enriquecimentos (/quote) simultâneos por página
+ENRICH_CONCURRENCY = 8
+# Tickers por chamada /quote durante o enriquecimento
+ENRICH_BATCH_SIZE = 15
+
+
+async def _quote_with_retry(client: BrapiClient, tickers: List[str]) -> Optional[dict]:
+    """Chama /quote com fundamental=true e retry com backoff; None se todas as tentativas falharem."""
     max_attempts = 3
     base_delay = 0.5
     for attempt in range(max_attempts):
         try:
             # Usar apenas fundamental=true para obter dados básicos do plano gratuito
-            response = await client.quote([asset.ticker], {"fundamental": "true"})
-            break
+            return await client.quote(tickers, {"fundamental": "true"})
         except NotFoundError:
-            # Asset not found – nothing to enrich
-            return
+            raise
         except Exception as e:
             if attempt == max_attempts - 1:
-                print(f"Failed to enrich {asset.ticker} after {max_attempts} attempts: {e}")
-                return
+                logger.warning("Failed to enrich %s after %d attempts: %s", ",".join(tickers), max_attempts, e)
+                return None
             # Exponential backoff with jitter
             delay = base_delay * (2 ** attempt) + random.random()
             await asyncio.sleep(delay)
-    # Process response
-    items = (response.get("results") or response.get("stocks") or []) if isinstance(response, dict) else []
-    if not items:
-        return
-    info = items[0]
-    
-    # Extrair dados básicos disponíveis no plano gratuito
+    return None
+
+
+def _quote_items(response: Any) -> List[dict]:
+    if not isinstance(response, dict):
+        return []
+    return response.get("results") or response.get("stocks") or []
+
+
+def _apply_enrichment(asset: Asset, info: dict) -> None:
+    """Copia para o ativo os campos do /quote disponíveis no plano gratuito."""
     asset.name = info.get("longName") or info.get("shortName") or asset.name
 
     new_type = _normalize_asset_type(info.get("type"))
@@ -152,21 +183,64 @@ async def _enrich_asset(asset: Asset, client: BrapiClient) -> None:
     asset.logo_url = info.get("logourl") or info.get("logoUrl") or info.get("logo") or asset.logo_url
     
     # Salvar apenas os dados essenciais para não sobrecarregar o banco
-    essential_fields = [
-        "currency", "marketCap", "shortName", "longName", 
-        "regularMarketChange", "regularMarketChangePercent", 
-        "regularMarketTime", "regularMarketPrice", 
-        "regularMarketDayHigh", "regularMarketDayRange", 
-        "regularMarketDayLow", "regularMarketVolume", 
-        "regularMarketPreviousClose", "regularMarketOpen", 
-        "fiftyTwoWeekRange", "fiftyTwoWeekLow", "fiftyTwoWeekHigh", 
-        "symbol", "logourl", "priceEarnings", "earningsPerShare"
-    ]
-    essential_raw = {field: info[field] for field in essential_fields if field in info}
-    asset.raw = essential_raw
+    asset.raw = {field: info[field] for field in info.keys() & _ESSENTIAL_FIELDS}
     asset.updated_at = utcnow()
-    # Pequena pausa para respeitar limites de taxa do plano gratuito
-    await asyncio.sleep(0.1)
+
+
+async def _enrich_asset(asset: Asset, client: BrapiClient) -> None:
+    """Busca detalhes adicionais do ativo via endpoint /quote com retry resiliente (Stage 4)."""
+    if not _needs_enrichment(asset):
+        return
+    try:
+        response = await _quote_with_retry(client, [asset.ticker])
+    except NotFoundError:
+        # Asset not found – nothing to enrich
+        return
+    items = _quote_items(response)
+    if items:
+        _apply_enrichment(asset, items[0])
+
+
+async def _enrich_assets_bulk(
+    assets: List[Asset],
+    client: BrapiClient,
+    chunk: int = ENRICH_BATCH_SIZE,
+) -> None:
+    """
+    Enriquece vários ativos com um /quote por lote de `chunk` tickers.
+    Lotes rodam em paralelo (até ENRICH_CONCURRENCY); o ritmo fica com o limiter
+    "quote" do BrapiClient, que no plano free já abre um ticker por requisição.
+    """
+    pending = [a for a in assets if _needs_enrichment(a)]
+    if not pending:
+        return
+    semaphore = asyncio.Semaphore(ENRICH_CONCURRENCY)
+
+    async def _enrich_chunk(batch: List[Asset]) -> None:
+        async with semaphore:
+            try:
+                response = await _quote_with_retry(client, [a.ticker for a in batch])
+            except NotFoundError:
+                # Um ticker inexistente derruba o lote inteiro: cai para um por vez
+                for asset in batch:
+                    await _enrich_asset(asset, client)
+                return
+        by_symbol = {
+            str(item.get("symbol") or "").upper(): item
+            for item in _quote_items(response)
+            if isinstance(item, dict)
+        }
+        for asset in batch:
+            info = by_symbol.get(asset.ticker)
+            if info is not None:
+                _apply_enrichment(asset, info)
+
+    batches = [pending[i:i + chunk] for i in range(0, len(pending), chunk)]
+    results = await asyncio.gather(*(_enrich_chunk(b) for b in batches), return_exceptions=True)
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            logger.warning("Error enriching assets %s: %s", ",".join(a.ticker for a in batch), result)
+
 
 async def _log_call(session: AsyncSession, *, endpoint: str, params: dict | None, cached: bool, status_code: int, response: dict | None = None, error: str | None = None, count: int = 0):
     """Registra chamada da API para observabilidade."""
@@ -179,12 +253,168 @@ async def _log_call(session: AsyncSession, *, endpoint: str, params: dict | None
         error=error, 
         response=normalize_for_json(response) if response else None
     )
+    # Gravação em lote em background; sem a task ativa (scripts), vai junto com o
+    # lote de páginas do sync, sem commit próprio
+    if enqueue_api_call(rec):
+        return
     session.add(rec)
+
+# Campos textuais só sobrescritos quando a nova linha traz valor (COALESCE no UPSERT)
+_UPSERT_KEEP_EXISTING = ("name", "type", "sector", "segment", "isin", "logo_url")
+
+
+def _upsert_assets_stmt(assets: List[Asset]):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE para uma página de ativos (uma ida ao banco).
+    Mantém o valor existente quando o novo é vazio; `raw` e `updated_at` sempre atualizam.
+    """
+    now = utcnow()
+    rows = []
+    for asset in assets:
+        row = asset.model_dump(exclude={"id"})
+        for field in _UPSERT_KEEP_EXISTING:
+            if not _has_value(row[field]):
+                row[field] = None
+        row["updated_at"] = now
+        rows.append(row)
+    stmt = mysql_insert(Asset).values(rows)
+    table = Asset.__table__
+    return stmt.on_duplicate_key_update(
+        **{field: func.coalesce(stmt.inserted[field], table.c[field]) for field in _UPSERT_KEEP_EXISTING},
+        raw=stmt.inserted.raw,
+        updated_at=stmt.inserted.updated_at,
+    )
+
+
+# Concorrência máxima de páginas buscadas em paralelo durante a sincronização
+SYNC_PAGE_CONCURRENCY = 8
+# Páginas gravadas por transação durante a sincronização
+COMMIT_EVERY_PAGES = 5
+
+
+async def _fetch_catalog_page(client: BrapiClient, asset_type: str, page: int, limit: int) -> dict:
+    """Busca uma página do catálogo, aguardando e repetindo em caso de 429."""
+    while True:
+        try:
+            logger.debug("Página %s: solicitando catálogo (%s)...", page, asset_type)
+            return await client.quote_list(
+                type=asset_type,
+                page=page,
+                page_size=limit,
+            )
+        except Exception as e:
+            status_code = getattr(getattr(e, "response", None), "status_code", None)
+            if status_code == 429:
+                await asyncio.sleep(2.0)
+                continue
+            raise
+
+
+async def _process_catalog_page(
+    session: AsyncSession,
+    client: BrapiClient,
+    payload: dict,
+    *,
+    page: int,
+    params: dict,
+    asset_type: str,
+    stats: Dict[str, Any],
+    touched: List[str],
+) -> bool:
+    """
+    Persiste os ativos de uma página. Retorna False quando a página veio vazia.
+    Os tickers gravados vão para `touched` até o próximo commit invalidar o cache.
+    """
+    stocks = payload.get("stocks") or payload.get("results") or []
+    logger.info("Página %s: recebidos %s símbolos", page, len(stocks))
+    await _log_call(
+        session,
+        endpoint="quote_list",
+        params=params,
+        cached=False,
+        status_code=200,
+        response=payload,
+        count=len(stocks),
+    )
+    assets = _extract_assets_from_list(payload, default_type=asset_type)
+    if not assets:
+        return False
+    # Enriquecimento em lote (no-op para ativos já completos) antes da escrita em lote
+    await _enrich_assets_bulk(assets, client)
+    try:
+        # Savepoint por página: uma falha desfaz só esta página, não as ainda não commitadas
+        async with session.begin_nested():
+            existing_result = await session.execute(
+                select(Asset.ticker).where(Asset.ticker.in_([a.ticker for a in assets]))
+            )
+            existing = set(existing_result.scalars().all())
+            await session.execute(_upsert_assets_stmt(assets))
+    except Exception as e:
+        stats["errors"] += len(assets)
+        logger.error("Error upserting page %s: %s", page, e)
+        return True
+    touched.extend(a.ticker for a in assets)
+    inserted = sum(1 for a in assets if a.ticker not in existing)
+    stats["inserted"] += inserted
+    stats["updated"] += len(assets) - inserted
+    stats["processed"] += len(assets)
+    logger.debug(
+        "Progresso: %s processados | %s novos | %s atualizados",
+        stats["processed"], stats["inserted"], stats["updated"],
+    )
+    stats["pages"] += 1
+    # flush por página, commit a cada COMMIT_EVERY_PAGES (o restante no fim do sync)
+    if stats["pages"] % COMMIT_EVERY_PAGES == 0:
+        await _commit_pages(session, touched)
+    else:
+        await session.flush()
+    logger.info("Página %s concluída (acumulado: %s processados)", page, stats["processed"])
+    return True
+
+
+async def _commit_pages(session: AsyncSession, touched: List[str]) -> None:
+    """
+    Commita e só então invalida o cache dos ativos gravados: invalidar antes
+    deixaria uma leitura concorrente recachear a linha antiga ainda commitada.
+    """
     await session.commit()
+    if touched:
+        await _invalidate_asset_cache(touched)
+        touched.clear()
+
+
+async def _commit_after_error(session: AsyncSession, touched: List[str]) -> None:
+    """
+    Commita as páginas já flushadas quando a sessão ainda está utilizável;
+    se a transação falhou (erro de flush/commit fora do savepoint), faz rollback.
+    """
+    transaction = session.get_transaction()
+    if transaction is not None and not transaction.is_active:
+        await session.rollback()
+        return
+    try:
+        await _commit_pages(session, touched)
+    except SQLAlchemyError:
+        logger.exception("Falha ao commitar páginas pendentes após erro no sync")
+        await session.rollback()
+
+
+def _has_next_page(payload: dict) -> bool:
+    current_page = payload.get("currentPage")
+    total_pages = payload.get("totalPages")
+    has_more = payload.get("hasNextPage")
+    if has_more is None and current_page is not None and total_pages is not None:
+        return current_page < total_pages
+    return bool(has_more)
+
 
 async def sync_assets(session: AsyncSession, asset_type: str, limit: int = 100) -> Dict[str, Any]:
     """
     Sincroniza catálogo de ativos da brapi para o banco local.
+
+    A primeira página informa `totalPages`; as demais são buscadas em paralelo
+    (até SYNC_PAGE_CONCURRENCY, respeitando o rate limiter do cliente) e
+    persistidas em ordem, já que a sessão não pode ser usada concorrentemente.
     
     Args:
         session: Sessão do banco
@@ -208,117 +438,159 @@ async def sync_assets(session: AsyncSession, asset_type: str, limit: int = 100)
         "errors": 0,
         "pages": 0
     }
-    
+
+    # Tickers gravados desde o último commit (cache invalidado após cada commit)
+    touched: List[str] = []
+
+    def _page_params(page: int) -> dict:
+        return {
+            "page": page,
+            "type": asset_type_normalized,
+            "limit": limit,
+        }
+
+    async def _log_page_error(page: int, e: Exception) -> None:
+        status_code = getattr(getattr(e, "response", None), "status_code", 500)
+        await _log_call(
+            session,
+            endpoint="available",
+            params=_page_params(page),
+            cached=False,
+            status_code=status_code,
+            error=str(e),
+        )
+
     try:
         page = 1
-        has_more = True
-        
-        while has_more:
-            params = {
-                "page": page,
-                "type": asset_type_normalized,
-                "limit": limit,
-            }
-            try:
-                print(f"      -> Página {page}: solicitando catálogo ({asset_type})...", flush=True)
-                payload = await client.quote_list(
-                    type=asset_type_normalized,
-                    page=page,
-                    page_size=limit,
-                )
-                stocks = payload.get("stocks") or payload.get("results") or []
-                print(f"      -> Página {page}: recebidos {len(stocks)} símbolos", flush=True)
-                await _log_call(
-                    session,
-                    endpoint="quote_list",
-                    params=params,
-                    cached=False,
-                    status_code=200,
-                    response=payload,
-                    count=len(stocks),
-                )
-                assets = _extract_assets_from_list(payload, default_type=asset_type)
-                if not assets:
-                    has_more = False
+        try:
+            payload = await _fetch_catalog_page(client, asset_type_normalized, page, limit)
+        except Exception as e:
+            await _log_page_error(page, e)
+            raise
+        has_more = await _process_catalog_page(
+            session, client, payload, page=page, params=_page_params(page),
+            asset_type=asset_type, stats=stats, touched=touched,
+        ) and _has_next_page(payload)
+
+        total_pages = payload.get("totalPages")
+        if has_more and isinstance(total_pages, int) and total_pages > page:
+            # Fan-out das páginas restantes; rede em paralelo, escrita sequencial
+            semaphore = asyncio.Semaphore(SYNC_PAGE_CONCURRENCY)
+
+            async def _fetch(p: int) -> dict:
+                async with semaphore:
+                    return await _fetch_catalog_page(client, asset_type_normalized, p, limit)
+
+            pages = range(page + 1, total_pages + 1)
+            payloads = await asyncio.gather(*(_fetch(p) for p in pages), return_exceptions=True)
+            for p, result in zip(pages, payloads):
+                if isinstance(result, Exception):
+                    await _log_page_error(p, result)
+                    raise result
+                if not await _process_catalog_page(
+                    session, client, result, page=p, params=_page_params(p),
+                    asset_type=asset_type, stats=stats, touched=touched,
+                ):
                     break
-                for asset in assets:
-                    try:
-                        # Upsert using session.merge which inserts if not exists or updates existing row
-                        # Ensure we keep existing fields unless new non-null values are provided
-                        existing = await session.execute(select(Asset).where(Asset.ticker == asset.ticker))
-                        existing_asset = existing.scalar_one_or_none()
-                        if existing_asset:
-                            # Update mutable fields only when new data is present
-                            if _has_value(asset.name):
-                                existing_asset.name = asset.name
-                            if _has_value(asset.type):
-                                existing_asset.type = asset.type
-                            if _has_value(asset.sector):
-                                existing_asset.sector = asset.sector
-                            if _has_value(asset.segment):
-                                existing_asset.segment = asset.segment
-                            if _has_value(asset.isin):
-                                existing_asset.isin = asset.isin
-                            if _has_value(asset.logo_url):
-                                existing_asset.logo_url = asset.logo_url
-                            if isinstance(asset.raw, dict) and asset.raw:
-                                existing_asset.raw = asset.raw
-                            existing_asset.updated_at = utcnow()
-                            await session.merge(existing_asset)
-                            stats["updated"] += 1
-                        else:
-                            # New asset – enrich if needed and add
-                            await _enrich_asset(asset, client)
-                            session.add(asset)
-                            stats["inserted"] += 1
-                        # Ensure asset has all enrichment data
-                        if _needs_enrichment(asset):
-                            await _enrich_asset(asset, client)
-                        stats["processed"] += 1
-                        if stats["processed"] % 100 == 0:
-                            print(
-                                f"      -> Progresso: {stats['processed']} processados | {stats['inserted']} novos | {stats['updated']} atualizados",
-                                flush=True,
-                            )
-                    except Exception as e:
-                        stats["errors"] += 1
-                        print(f"Error processing asset {asset.ticker}: {e}")
-                await session.commit()
-                stats["pages"] += 1
-                print(
-                    f"      -> Página {page} concluída (acumulado: {stats['processed']} processados)",
-                    flush=True,
-                )
-                current_page = payload.get("currentPage")
-                total_pages = payload.get("totalPages")
-                has_more = bool(payload.get("hasNextPage"))
-                if has_more is None and current_page is not None and total_pages is not None:
-                    has_more = current_page < total_pages
-                if has_more:
-                    page += 1
-                    await asyncio.sleep(0.5)
-            except Exception as e:
-                status_code = getattr(getattr(e, "response", None), "status_code", 500)
-                await _log_call(
-                    session,
-                    endpoint="available",
-                    params=params,
-                    cached=False,
-                    status_code=status_code,
-                    error=str(e),
-                )
-                if status_code == 429:
-                    await asyncio.sleep(2.0)
-                    continue
-                else:
-                    raise e
+        else:
+            # Sem totalPages: segue página a página enquanto houver próxima
+            while has_more:
+                page += 1
+                await asyncio.sleep(0.5)
+                try:
+                    payload = await _fetch_catalog_page(client, asset_type_normalized, page, limit)
+                except Exception as e:
+                    await _log_page_error(page, e)
+                    raise
+                has_more = await _process_catalog_page(
+                    session, client, payload, page=page, params=_page_params(page),
+                    asset_type=asset_type, stats=stats, touched=touched,
+                ) and _has_next_page(payload)
     except Exception as e:
         stats["errors"] += 1
-        print(f"Error in sync_assets: {e}")
+        logger.error("Error in sync_assets: %s", e)
+        # Mantém as páginas já gravadas sem mascarar o erro original
+        await _commit_after_error(session, touched)
         raise e
+    else:
+        # Confirma as páginas (e logs) ainda pendentes do último lote
+        await _commit_pages(session, touched)
+    finally:
+        # Páginas já gravadas podem ter trazido tickers novos
+        invalidate_catalog_tickers()
     
     return stats
 
+# Colunas servidas pela listagem (projeção: evita hidratar objetos ORM completos)
+_LIST_COLUMNS = (
+    Asset.id,
+    Asset.ticker,
+    Asset.name,
+    Asset.type,
+    Asset.sector,
+    Asset.segment,
+    Asset.isin,
+    Asset.logo_url,
+    Asset.updated_at,
+)
+
+# Chaves de ordenação (coluna, descendente?) por sort_by; `id` desempata e viabiliza keyset.
+_SORT_KEYS = {
+    "name": ((Asset.name, False), (Asset.id, False)),
+    "ticker": ((Asset.ticker, False), (Asset.id, False)),
+    "sector": ((Asset.sector, False), (Asset.name, False), (Asset.id, False)),
+    "updated_at": ((Asset.updated_at, True), (Asset.id, True)),
+}
+
+
+def _encode_cursor(sort_by: str, values: List[Any]) -> str:
+    """Serializa a posição (valores da chave de ordenação do último item) em base64 urlsafe."""
+    raw = json.dumps({"s": sort_by, "v": values}, separators=(",", ":"), default=json_serializer)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> List[Any]:
+    """Decodifica o cursor gerado por `_encode_cursor` para a ordenação informada."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values = data["v"]
+        if data["s"] != sort_by or len(values) != len(_SORT_KEYS[sort_by]):
+            raise ValueError
+        if sort_by == "updated_at" and values[0] is not None:
+            values[0] = datetime.fromisoformat(values[0])
+        return values
+    except Exception:
+        raise ValueError("Cursor inválido para a ordenação informada")
+
+
+def _seek_after(keys, values: List[Any]):
+    """
+    Predicado keyset "linhas depois de `values`" na ordem de `keys`.
+    Considera a ordenação do MySQL: NULL primeiro em ASC e por último em DESC.
+    """
+    clauses = []
+    for i, (col, descending) in enumerate(keys):
+        value = values[i]
+        prefix = [col_j.is_(None) if v is None else col_j == v for (col_j, _), v in zip(keys[:i], values[:i])]
+        if descending:
+            after = false() if value is None else or_(col < value, col.is_(None))
+        else:
+            after = col.isnot(None) if value is None else col > value
+        clauses.append(and_(*prefix, after))
+    return or_(*clauses)
+
+
+# TTL do total por filtro (COUNT é a consulta mais cara da listagem)
+_COUNT_TTL_SECONDS = 60
+
+
+async def _count_assets(count_query) -> int:
+    """COUNT em sessão própria: AsyncSession não aceita execuções concorrentes."""
+    async with AsyncSessionLocal() as count_session:
+        result = await count_session.execute(count_query)
+        return result.scalar()
+
+
 async def list_assets(
     session: AsyncSession,
     asset_type: Optional[str] = None,
@@ -326,7 +598,8 @@ async def list_assets(
     search: Optional[str] = None,
     page: int = 1,
     limit: int = 50,
-    sort_by: str = "name"
+    sort_by: str = "name",
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Lista ativos do catálogo local com filtros e paginação.
@@ -339,20 +612,27 @@ async def list_assets(
         page: Número da página
         limit: Itens por página
         sort_by: Ordenação (name, ticker, sector, updated_at)
+        cursor: Cursor keyset (`next_cursor` da página anterior); quando informado, `page` é ignorado
         
     Returns:
         Dict com resultados paginados
     """
+    if sort_by not in _SORT_KEYS:
+        sort_by = "name"
+    sort_keys = _SORT_KEYS[sort_by]
+    cursor_values = _decode_cursor(cursor, sort_by) if cursor else None
+
     # Cache curto para listagens
     r = await get_redis()
-    cache_key = make_cache_key("catalog_v1", asset_type, sector, search, page, limit, sort_by)
+    cache_key = make_cache_key("catalog_v1", asset_type, sector, search, page, limit, sort_by, cursor)
     
     cached = await r.get(cache_key)
     if cached:
-        return json.loads(cached)
+        # orjson lê os bytes do Redis direto
+        return orjson.loads(cached)
     
     # Construir query
-    query = select(Asset)
+    query = select(*_LIST_COLUMNS)
     count_query = select(func.count(Asset.id))
     
     # Aplicar filtros
@@ -374,56 +654,77 @@ async def list_assets(
         query = query.where(and_(*filters))
         count_query = count_query.where(and_(*filters))
     
-    # Contar total
-    total_result = await session.execute(count_query)
-    total = total_result.scalar()
-    
     # Ordenação
-    if sort_by == "ticker":
-        query = query.order_by(Asset.ticker)
-    elif sort_by == "sector":
-        query = query.order_by(Asset.sector, Asset.name)
-    elif sort_by == "updated_at":
-        query = query.order_by(desc(Asset.updated_at))
-    else:
-        query = query.order_by(Asset.name)
+    query = query.order_by(*(desc(col) if descending else col for col, descending in sort_keys))
     
-    # Paginação
-    offset = (page - 1) * limit
-    query = query.offset(offset).limit(limit)
+    # Paginação: keyset quando há cursor (custo constante por página), OFFSET caso contrário
+    if cursor_values is not None:
+        query = query.where(_seek_after(sort_keys, cursor_values)).limit(limit)
+    else:
+        offset = (page - 1) * limit
+        query = query.offset(offset).limit(limit)
     
-    # Executar
-    result = await session.execute(query)
-    assets = result.scalars().all()
+    # Contar total: depende só dos filtros, então é cacheado à parte e reaproveitado
+    # entre páginas/ordenações. Sem cache, COUNT e página rodam em paralelo.
+    count_key = make_cache_key("catalog_v1_count", asset_type, sector, search)
+    cached_total = await r.get(count_key)
+    if cached_total is not None:
+        total = int(cached_total)
+        result = await session.execute(query)
+    else:
+        total, result = await asyncio.gather(_count_assets(count_query), session.execute(query))
+        await r.setex(count_key, _COUNT_TTL_SECONDS, str(total))
+    rows = result.mappings().all()
     
     # Serializar resposta
     response = {
         "assets": [
             {
-                "ticker": asset.ticker,
-                "name": asset.name,
-                "type": asset.type,
-                "sector": asset.sector,
-                "segment": asset.segment,
-                "isin": asset.isin,
-                "logo_url": asset.logo_url,
-                "updated_at": asset.updated_at.isoformat() if asset.updated_at else None
+                "ticker": row["ticker"],
+                "name": row["name"],
+                "type": row["type"],
+                "sector": row["sector"],
+                "segment": row["segment"],
+                "isin": row["isin"],
+                "logo_url": row["logo_url"],
+                "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None
             }
-            for asset in assets
+            for row in rows
         ],
         "pagination": {
             "page": page,
             "limit": limit,
             "total": total,
             "pages": (total + limit - 1) // limit
-        }
+        },
+        "next_cursor": None,
     }
+    if len(rows) == limit:
+        last = rows[-1]
+        response["next_cursor"] = _encode_cursor(sort_by, [last[col.key] for col, _ in sort_keys])
     
-    # Cache por 5 minutos
-    await r.setex(cache_key, 300, json.dumps(response, default=json_serializer))
+    # Cache por 5 minutos; só tipos JSON nativos (updated_at já em ISO), sem callback default
+    await r.setex(cache_key, 300, orjson.dumps(response))
     
     return response
 
+# Ativo por ticker em cache; o sync invalida as chaves das páginas após cada commit
+_ASSET_TTL_SECONDS = 300
+
+
+def _asset_cache_key(ticker: str) -> str:
+    return make_cache_key("asset", ticker)
+
+
+async def _invalidate_asset_cache(tickers: List[str]) -> None:
+    """Remove do Redis os ativos regravados (best effort: as páginas já foram commitadas)."""
+    try:
+        r = await get_redis()
+        await r.unlink(*(_asset_cache_key(t) for t in tickers))
+    except RedisError as e:
+        logger.warning("Falha ao invalidar cache de %d ativos: %s", len(tickers), e)
+
+
 async def get_asset_by_ticker(session: AsyncSession, ticker: str) -> Optional[Asset]:
     """
     Busca ativo específico por ticker.
@@ -436,7 +737,53 @@ async def get_asset_by_ticker(session: AsyncSession, ticker: str) -> Optional[As
         Asset ou None se não encontrado
     """
     ticker = ticker.upper().strip()
+    r = await get_redis()
+    cache_key = _asset_cache_key(ticker)
+    cached = await r.get(cache_key)
+    if cached:
+        return Asset.model_validate(orjson.loads(cached))
     result = await session.execute(
         select(Asset).where(Asset.ticker == ticker)
     )
-    return result.scalar_one_or_none()
+    asset = result.scalar_one_or_none()
+    # Só acertos são cacheados: ticker novo aparece assim que o sync gravar
+    if asset is not None:
+        await r.setex(cache_key, _ASSET_TTL_SECONDS, orjson.dumps(asset.model_dump()))
+    return asset
+
+
+# Conjunto de tickers do catálogo em memória (validação O(1) nas rotas).
+# Invalidado pelo sync; TTL cobre syncs feitos por outros workers.
+_TICKER_CACHE: Optional[frozenset[str]] = None
+_TICKER_CACHE_TS = 0.0
+_TICKER_CACHE_TTL_SECONDS = 300
+_TICKER_CACHE_LOCK = asyncio.Lock()
+
+
+def invalidate_catalog_tickers() -> None:
+    """Descarta o conjunto de tickers em memória (recarregado no próximo acesso)."""
+    global _TICKER_CACHE
+    _TICKER_CACHE = None
+
+
+async def get_catalog_tickers(session: AsyncSession) -> frozenset[str]:
+    """
+    Retorna todos os tickers do catálogo, carregados uma vez e mantidos em memória.
+    
+    Args:
+        session: Sessão do banco (usada apenas quando o cache está vazio/expirado)
+        
+    Returns:
+        frozenset com os tickers (maiúsculas)
+    """
+    global _TICKER_CACHE, _TICKER_CACHE_TS
+    if _TICKER_CACHE is not None and time.monotonic() - _TICKER_CACHE_TS < _TICKER_CACHE_TTL_SECONDS:
+        return _TICKER_CACHE
+    async with _TICKER_CACHE_LOCK:
+        # Outra corrotina pode ter recarregado enquanto esperávamos o lock
+        if _TICKER_CACHE is not None and time.monotonic() - _TICKER_CACHE_TS < _TICKER_CACHE_TTL_SECONDS:
+            return _TICKER_CACHE
+        result = await session.execute(select(Asset.ticker))
+        _TICKER_CACHE = frozenset(result.scalars().all())
+        _TICKER_CACHE_TS = time.monotonic()
+        return _TICKER_CACHE
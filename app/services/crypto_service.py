@@ -4,7 +4,9 @@ from sqlmodel import delete
 from app.core.cache import get_redis, cleanup_cache_keys
 from app.core.config import settings
 from app.services.brapi_client import BrapiClient
+from app.services._quote_cache import crypto_cache
 from app.services.utils.key import make_cache_key
+from app.services.utils.symbols import parse_symbols
 from app.services.utils.json_serializer import json_serializer, normalize_for_json, normalize_numeric, normalize_timestamp
 from app.models import ApiCall, CryptoSnapshot
 from datetime import datetime, timezone, timedelta
@@ -12,6 +14,8 @@ import json
 from app.services.validation import try_validate
 import httpx
 
+_TTL_CRYPTO = settings.cache_ttl_crypto_seconds
+
 def _ts_to_datetime(ts: Any):
     if ts is None:
         return None
@@ -36,18 +40,27 @@ def _extract_snapshots(payload: dict) -> list[CryptoSnapshot]:
     return out
 
 async def get_crypto(session: AsyncSession, coins: str, currency: str) -> dict[str, Any]:
-    r = await get_redis()
+    symbols = parse_symbols(coins)
     params = {"currency": currency}
-    key = make_cache_key("crypto", coins, params)
+    key = make_cache_key("crypto", ",".join(symbols), params)
+    # Cache em processo (TTL de segundos) antes do Redis
+    local_key = (symbols, currency.upper())
+    hot = crypto_cache.get(local_key)
+    if hot is not None:
+        await _log_call(session, "crypto", coins, params, True, 200, hot)
+        return {"cached": True, "results": hot}
+
+    r = await get_redis()
 
     cached = await r.get(key)
     if cached:
         payload = json.loads(cached)
+        crypto_cache.set(local_key, payload)
         await _log_call(session, "crypto", coins, params, True, 200, payload)
         return {"cached": True, "results": payload}
 
     client = BrapiClient()
-    coin_list = [c.strip() for c in coins.split(",") if c.strip()]
+    coin_list = list(symbols)
 
     try:
         payload = await client.crypto(coin_list, currency)
@@ -63,14 +76,14 @@ async def get_crypto(session: AsyncSession, coins: str, currency: str) -> dict[s
         await _log_call(session, "crypto", coins, params, False, 400, {"message": str(e)})
         return {"cached": False, "error": True, "status": 400, "message": str(e)}
 
-    ttl = settings.cache_ttl_crypto_seconds
-    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=ttl)
+    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=_TTL_CRYPTO)
 
     _ok, _obj, _err = try_validate("app.openapi_models:CryptoResponse", payload)
     if not _ok:
         await _log_call(session, "crypto", coins, params, False, 500, {"validation_error": _err})
         return {"cached": False, "error": True, "status": 500, "message": "Response validation failed", "details": _err}
 
+    crypto_cache.set(local_key, payload)
     await _log_call(session, "crypto", coins, params, False, 200, payload)
 
     snaps = _extract_snapshots(payload)
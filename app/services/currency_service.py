@@ -4,7 +4,9 @@ from sqlmodel import delete
 from app.core.cache import get_redis, cleanup_cache_keys
 from app.core.config import settings
 from app.services.brapi_client import BrapiClient
+from app.services._quote_cache import currency_cache
 from app.services.utils.key import make_cache_key
+from app.services.utils.symbols import parse_symbols
 from app.services.utils.json_serializer import json_serializer, normalize_for_json, normalize_numeric, normalize_timestamp
 from app.models import ApiCall, CurrencySnapshot
 from datetime import datetime, timezone, timedelta
@@ -12,6 +14,8 @@ import json
 from app.services.validation import try_validate
 import httpx
 
+_TTL_CURRENCY = settings.cache_ttl_currency_seconds
+
 def _ts_to_datetime(ts: Any):
     if ts is None:
         return None
@@ -36,18 +40,27 @@ def _extract_snapshots(payload: dict) -> list[CurrencySnapshot]:
     return out
 
 async def get_currency(session: AsyncSession, pairs: str) -> dict[str, Any]:
-    r = await get_redis()
+    symbols = parse_symbols(pairs)
     params: dict[str, Any] = {}
-    key = make_cache_key("currency", pairs, params)
+    key = make_cache_key("currency", ",".join(symbols), params)
+    # Cache em processo (TTL de segundos) antes do Redis
+    local_key = symbols
+    hot = currency_cache.get(local_key)
+    if hot is not None:
+        await _log_call(session, "currency", pairs, params, True, 200, hot)
+        return {"cached": True, "results": hot}
+
+    r = await get_redis()
 
     cached = await r.get(key)
     if cached:
         payload = json.loads(cached)
+        currency_cache.set(local_key, payload)
         await _log_call(session, "currency", pairs, params, True, 200, payload)
         return {"cached": True, "results": payload}
 
     client = BrapiClient()
-    pair_list = [p.strip() for p in pairs.split(",") if p.strip()]
+    pair_list = list(symbols)
     try:
         payload = await client.currency(pair_list)
     except httpx.HTTPStatusError as e:
@@ -59,14 +72,14 @@ async def get_currency(session: AsyncSession, pairs: str) -> dict[str, Any]:
         await _log_call(session, "currency", pairs, params, False, e.response.status_code, body)
         return {"cached": False, "error": True, "status": e.response.status_code, "message": body.get("message"), "details": body}
 
-    ttl = settings.cache_ttl_currency_seconds
-    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=ttl)
+    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=_TTL_CURRENCY)
 
     _ok, _obj, _err = try_validate("app.openapi_models:CurrencyResponse", payload)
     if not _ok:
         await _log_call(session, "currency", pairs, params, False, 500, {"validation_error": _err})
         return {"cached": False, "error": True, "status": 500, "message": "Response validation failed", "details": _err}
 
+    currency_cache.set(local_key, payload)
     await _log_call(session, "currency", pairs, params, False, 200, payload)
 
     snaps = _extract_snapshots(payload)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -15,6 +17,8 @@ from app.services.utils.json_serializer import json_serializer, normalize_for_js
 
 import json
 
+_TTL_QUOTE = settings.cache_ttl_quote_seconds
+
 
 def _ts_to_iso(ts: Any) -> Optional[str]:
     if ts in (None, "", 0):
@@ -47,11 +51,20 @@ def _normalize_history(payload: Dict[str, Any]) -> Dict[str, Any]:
         []
     )
 
+    # uma única passada: converte a data e já descarta candles sem data
     items: List[Dict[str, Any]] = []
+    in_order = True
+    last_date = ""
     for row in hist:
+        date = _ts_to_iso(row.get("date"))
+        if date is None:
+            continue
+        if date < last_date:
+            in_order = False
+        last_date = date
         items.append(
             {
-                "date": _ts_to_iso(row.get("date")),
+                "date": date,
                 "open": row.get("open"),
                 "high": row.get("high"),
                 "low": row.get("low"),
@@ -60,13 +73,47 @@ def _normalize_history(payload: Dict[str, Any]) -> Dict[str, Any]:
             }
         )
 
-    # ordena por data crescente (só por garantia)
-    items = [x for x in items if x["date"] is not None]
-    items.sort(key=lambda x: x["date"])
+    # ordena por data crescente apenas se a brapi não devolveu em ordem
+    if not in_order:
+        items.sort(key=lambda x: x["date"])
 
     return {"symbol": symbol, "items": items}
 
 
+def to_columnar(history: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converte o histórico normalizado (lista de candles) para layout colunar,
+    evitando repetir as chaves OHLCV em cada linha.
+    Retorno: {"cached": ..., "symbol": ..., "dates": [...], "opens": [...], ...}
+    """
+    items = history.get("items") or []
+    return {
+        "cached": history.get("cached", False),
+        "symbol": history.get("symbol"),
+        "dates": [x["date"] for x in items],
+        "opens": [x["open"] for x in items],
+        "highs": [x["high"] for x in items],
+        "lows": [x["low"] for x in items],
+        "closes": [x["close"] for x in items],
+        "volumes": [x["volume"] for x in items],
+    }
+
+
+async def iter_history_ndjson(history: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """
+    Serializa o histórico normalizado como NDJSON: uma linha de cabeçalho
+    ({"cached", "symbol", "count"}) seguida de um candle por linha.
+    Cada linha é codificada sob demanda, sem montar o corpo inteiro em memória.
+    """
+    items = history.get("items") or []
+    yield orjson.dumps(
+        {"cached": history.get("cached", False), "symbol": history.get("symbol"), "count": len(items)},
+        option=orjson.OPT_APPEND_NEWLINE,
+    )
+    for item in items:
+        yield orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE)
+
+
 async def _log_call(
     session: AsyncSession,
     endpoint: str,
@@ -123,8 +170,7 @@ async def get_history(
     _ok, _obj, _err = try_validate("app.openapi_models:QuoteResponse", raw_payload)
 
     # cacheia (usa o TTL de quote)
-    ttl = settings.cache_ttl_quote_seconds
-    await r.set(cache_key, json.dumps(raw_payload, separators=(",", ":"), default=json_serializer), ex=ttl)
+    await r.set(cache_key, json.dumps(raw_payload, separators=(",", ":"), default=json_serializer), ex=_TTL_QUOTE)
 
     await _log_call(session, "quote_history", ticker, params, False, 200, raw_payload)
 
@@ -11,6 +11,8 @@ import json
 from app.services.validation import try_validate
 import httpx
 
+_TTL_MACRO = settings.cache_ttl_macro_seconds
+
 def _parse_date(s: Any):
     if not s:
         return None
@@ -61,8 +63,7 @@ async def get_inflation(session: AsyncSession, country: str) -> dict[str, Any]:
         await _log_call(session, "inflation", country, params, False, e.response.status_code, body)
         return {"cached": False, "error": True, "status": e.response.status_code, "message": body.get("message"), "details": body}
 
-    ttl = settings.cache_ttl_macro_seconds
-    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=ttl)
+    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=_TTL_MACRO)
 
     _ok, _obj, _err = try_validate("app.openapi_models:MacroResponse", payload)
 
@@ -98,8 +99,7 @@ async def get_prime_rate(session: AsyncSession, country: str) -> dict[str, Any]:
         await _log_call(session, "prime_rate", country, params, False, e.response.status_code, body)
         return {"cached": False, "error": True, "status": e.response.status_code, "message": body.get("message"), "details": body}
 
-    ttl = settings.cache_ttl_macro_seconds
-    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=ttl)
+    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=_TTL_MACRO)
 
     _ok, _obj, _err = try_validate("app.openapi_models:MacroResponse", payload)
 
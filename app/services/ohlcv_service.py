@@ -1,9 +1,9 @@
 from typing import Any, List, Optional, Dict
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, update, and_, func
+from sqlmodel import select, update, and_, func, exists
 from sqlalchemy import desc
-from app.core.cache import get_redis
+from app.core.cache import get_redis, unlink_keys
 from app.core.config import settings
 from app.services.brapi_client import BrapiClient
 from brapi import NotFoundError
@@ -13,8 +13,13 @@ from app.models import ApiCall, Asset, QuoteOHLCV
 from datetime import datetime, timezone, timedelta
 import json
 import asyncio
+import logging
 import random
 
+logger = logging.getLogger(__name__)
+
+_TTL_QUOTE = settings.cache_ttl_quote_seconds
+
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -74,13 +79,13 @@ async def _log_call(session: AsyncSession, *, endpoint: str, tickers: str, param
     session.add(rec)
     await session.commit()
 
-async def _fetch_quote_with_semaphore(client: BrapiClient, ticker: str, range: str = "3mo", interval: str = "1d", semaphore: asyncio.Semaphore = None) -> Dict[str, Any]:
+async def _fetch_quote_with_semaphore(client: BrapiClient, ticker: str | List[str], range: str = "3mo", interval: str = "1d", semaphore: asyncio.Semaphore = None) -> Dict[str, Any]:
     """
     Busca cotação com controle de semáforo para respeitar rate limiting.
     
     Args:
         client: Cliente brapi
-        ticker: Símbolo do ativo
+        ticker: Símbolo do ativo (ou lista de símbolos)
         range: Período histórico
         interval: Intervalo dos dados
         semaphore: Semáforo para controle de concorrência
@@ -94,9 +99,9 @@ async def _fetch_quote_with_semaphore(client: BrapiClient, ticker: str, range: s
     else:
         return await _fetch_quote_single(client, ticker, range, interval)
 
-async def _fetch_quote_single(client: BrapiClient, ticker: str, range_period: str, interval: str) -> Dict[str, Any]:
+async def _fetch_quote_single(client: BrapiClient, ticker: str | List[str], range_period: str, interval: str) -> Dict[str, Any]:
     """
-    Busca cotação individual com retry e jitter.
+    Busca cotação (um ticker ou um lote) com retry e jitter.
     """
     params = {
         "range": range_period,
@@ -108,8 +113,8 @@ async def _fetch_quote_single(client: BrapiClient, ticker: str, range_period: st
     
     for attempt in range(max_retries):
         try:
-            # Chamar API para um ticker apenas (plano free)
-            result = await client.quote([ticker], params)
+            # Um ticker (plano free) ou lote; o client decide como agrupar conforme o plano
+            result = await client.quote([ticker] if isinstance(ticker, str) else ticker, params)
             
             # Jitter entre chamadas para não martelar
             jitter = 0.2 + random.random() * 0.4
@@ -125,7 +130,11 @@ async def _fetch_quote_single(client: BrapiClient, ticker: str, range_period: st
             delay = base_delay * (2 ** attempt) + random.random()
             await asyncio.sleep(delay)
 
-async def backfill_ohlcv(session: AsyncSession, tickers: List[str], range: str = "3mo", interval: str = "1d", max_concurrency: int = 3) -> Dict[str, Any]:
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+async def backfill_ohlcv(session: AsyncSession, tickers: List[str], range: str = "3mo", interval: str = "1d", max_concurrency: int = 3, batch_size: int = 1) -> Dict[str, Any]:
     """
     Preenche dados históricos OHLCV para lista de tickers.
     Respeita limites do plano free (1 ticker por requisição).
@@ -136,6 +145,7 @@ async def backfill_ohlcv(session: AsyncSession, tickers: List[str], range: str =
         range: Período histórico (1mo, 3mo, 6mo, 1y, etc)
         interval: Intervalo (1d, 1wk, 1mo)
         max_concurrency: Máximo de requisições simultâneas
+        batch_size: Tickers por requisição à brapi (lotes > 1 só reduzem chamadas em planos pagos)
         
     Returns:
         Estatísticas da operação
@@ -153,20 +163,153 @@ async def backfill_ohlcv(session: AsyncSession, tickers: List[str], range: str =
     
     client = BrapiClient()
     semaphore = asyncio.Semaphore(max_concurrency)
+    batches = _chunks(tickers, batch_size)
+
+    async def _fetch(batch: List[str]) -> Dict[str, Any] | Exception:
+        try:
+            return await _fetch_quote_with_semaphore(
+                client, batch[0] if len(batch) == 1 else batch, range, interval, semaphore
+            )
+        except Exception as e:
+            return e
+
+    # Requisições em paralelo (até max_concurrency lotes); gravação na sessão em
+    # sequência, na ordem dos lotes, para evitar conflitos de sessão
+    fetches = [asyncio.create_task(_fetch(batch)) for batch in batches]
+    try:
+        for batch, fetch in zip(batches, fetches):
+            result = await fetch
+            if len(batch) == 1:
+                await _store_ticker_result(session, batch[0], range, interval, result, stats)
+            else:
+                await _process_batch_ohlcv(session, client, batch, range, interval, semaphore, stats, result)
+    finally:
+        for fetch in fetches:
+            fetch.cancel()
     
-    # Processar tickers de forma sequencial para evitar conflitos de sessão
-    for ticker in tickers:
-        await _process_ticker_ohlcv(session, client, ticker, range, interval, semaphore, stats)
+    if stats["inserted"] or stats["updated"]:
+        await _invalidate_ohlcv_cache(tickers)
     
     return stats
 
+async def _invalidate_ohlcv_cache(tickers: List[str]) -> None:
+    """
+    Remove respostas cacheadas de get_ohlcv/get_available_dates dos tickers atualizados.
+    Um único SCAN pelo prefixo comum e UNLINK em lotes; falhas do Redis não interrompem o backfill.
+    """
+    normalized = {t.upper().strip() for t in tickers}
+    # Chaves chegam do Redis como bytes (decode_responses=False)
+    prefixes = tuple(f"{p}:{t}:".encode() for t in normalized for p in ("ohlcv_v1", "ohlcv_dates_v1"))
+    try:
+        r = await get_redis()
+        matches = [key async for key in r.scan_iter(match="ohlcv*", count=500) if key.startswith(prefixes)]
+        await unlink_keys(matches, batch_size=500)
+    except Exception as e:
+        logger.warning("Falha ao invalidar cache OHLCV: %s", e)
+
+async def _process_batch_ohlcv(session: AsyncSession, client: BrapiClient, batch: List[str], range: str, interval: str, semaphore: asyncio.Semaphore, stats: Dict[str, Any], response: Dict[str, Any] | Exception) -> None:
+    """
+    Grava o resultado de um lote de tickers buscado com uma única chamada à brapi.
+    Se o lote falhou (ex.: um ticker inexistente), cai para o processamento individual.
+    """
+    if isinstance(response, Exception):
+        logger.warning("Falha no lote %s: %s. Processando tickers individualmente.", ",".join(batch), response)
+        for ticker in batch:
+            await _process_ticker_ohlcv(session, client, ticker, range, interval, semaphore, stats)
+        return
+    
+    await _log_call(
+        session,
+        endpoint="quote_backfill",
+        tickers=",".join(batch),
+        params={"range": range, "interval": interval},
+        cached=False,
+        status_code=200,
+        response=response,
+        count=len(batch)
+    )
+    
+    by_symbol = {
+        (item.get("symbol") or "").upper().strip(): item
+        for item in (response.get("results") or response.get("stocks") or [])
+    }
+    for ticker in batch:
+        item = by_symbol.get(ticker.upper().strip())
+        if item is None:
+            # Ticker sem dados no retorno do lote
+            stats["processed"] += 1
+            continue
+        try:
+            await _store_ticker_ohlcv(session, ticker, {"results": [item]}, stats)
+        except Exception as e:
+            stats["errors"] += 1
+            logger.warning("Error processing ticker %s: %s", ticker, e)
+
+async def _store_ticker_ohlcv(session: AsyncSession, ticker: str, response: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    """
+    Extrai os candles da resposta e faz upsert por data para um ticker.
+    """
+    # Extrair dados OHLCV
+    ohlcv_list = _extract_ohlcv_from_quote(response, ticker)
+    
+    if not ohlcv_list:
+        stats["processed"] += 1
+        return
+    
+    # Upsert para cada data
+    for ohlcv in ohlcv_list:
+        try:
+            # Verificar se já existe
+            existing = await session.execute(
+                select(QuoteOHLCV).where(
+                    and_(
+                        QuoteOHLCV.ticker == ohlcv.ticker,
+                        QuoteOHLCV.date == ohlcv.date
+                    )
+                )
+            )
+            existing_ohlcv = existing.scalar_one_or_none()
+            
+            if existing_ohlcv:
+                # Update
+                existing_ohlcv.open = ohlcv.open
+                existing_ohlcv.high = ohlcv.high
+                existing_ohlcv.low = ohlcv.low
+                existing_ohlcv.close = ohlcv.close
+                existing_ohlcv.volume = ohlcv.volume
+                existing_ohlcv.adj_close = ohlcv.adj_close
+                existing_ohlcv.raw = ohlcv.raw
+                stats["updated"] += 1
+            else:
+                # Insert
+                session.add(ohlcv)
+                stats["inserted"] += 1
+            
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"Error upserting OHLCV for {ticker} {ohlcv.date}: {e}")
+    
+    await session.commit()
+    stats["processed"] += 1
+
 async def _process_ticker_ohlcv(session: AsyncSession, client: BrapiClient, ticker: str, range: str, interval: str, semaphore: asyncio.Semaphore, stats: Dict[str, Any]) -> None:
     """
     Processa um ticker individual para backfill OHLCV.
     """
     try:
         # Buscar dados da API
-        response = await _fetch_quote_with_semaphore(client, ticker, range, interval)
+        response = await _fetch_quote_with_semaphore(client, ticker, range, interval, semaphore)
+    except Exception as e:
+        response = e
+    await _store_ticker_result(session, ticker, range, interval, response, stats)
+
+async def _store_ticker_result(session: AsyncSession, ticker: str, range: str, interval: str, response: Dict[str, Any] | Exception, stats: Dict[str, Any]) -> None:
+    """
+    Registra e grava o resultado (ou a falha) da busca de um ticker.
+    """
+    try:
+        if isinstance(response, Exception):
+            raise response
         
         await _log_call(
             session,
@@ -179,48 +322,7 @@ async def _process_ticker_ohlcv(session: AsyncSession, client: BrapiClient, tick
             count=1
         )
         
-        # Extrair dados OHLCV
-        ohlcv_list = _extract_ohlcv_from_quote(response, ticker)
-        
-        if not ohlcv_list:
-            stats["processed"] += 1
-            return
-        
-        # Upsert para cada data
-        for ohlcv in ohlcv_list:
-            try:
-                # Verificar se já existe
-                existing = await session.execute(
-                    select(QuoteOHLCV).where(
-                        and_(
-                            QuoteOHLCV.ticker == ohlcv.ticker,
-                            QuoteOHLCV.date == ohlcv.date
-                        )
-                    )
-                )
-                existing_ohlcv = existing.scalar_one_or_none()
-                
-                if existing_ohlcv:
-                    # Update
-                    existing_ohlcv.open = ohlcv.open
-                    existing_ohlcv.high = ohlcv.high
-                    existing_ohlcv.low = ohlcv.low
-                    existing_ohlcv.close = ohlcv.close
-                    existing_ohlcv.volume = ohlcv.volume
-                    existing_ohlcv.adj_close = ohlcv.adj_close
-                    existing_ohlcv.raw = ohlcv.raw
-                    stats["updated"] += 1
-                else:
-                    # Insert
-                    session.add(ohlcv)
-                    stats["inserted"] += 1
-                
-            except Exception as e:
-                stats["errors"] += 1
-                print(f"Error upserting OHLCV for {ticker} {ohlcv.date}: {e}")
-        
-        await session.commit()
-        stats["processed"] += 1
+        await _store_ticker_ohlcv(session, ticker, response, stats)
         
     except NotFoundError as e:
         stats["processed"] += 1
@@ -264,7 +366,7 @@ async def _process_ticker_ohlcv(session: AsyncSession, client: BrapiClient, tick
         )
         print(f"Error processing ticker {ticker}: {error_text}")
 
-async def update_ohlcv_latest(session: AsyncSession, tickers: List[str], max_concurrency: int = 3) -> Dict[str, Any]:
+async def update_ohlcv_latest(session: AsyncSession, tickers: List[str], max_concurrency: int = 3, batch_size: int = 1) -> Dict[str, Any]:
     """
     Atualiza dados mais recentes para tickers existentes.
     Busca apenas últimos dias para atualização incremental.
@@ -273,6 +375,7 @@ async def update_ohlcv_latest(session: AsyncSession, tickers: List[str], max_con
         session: Sessão do banco
         tickers: Lista de símbolos para atualizar
         max_concurrency: Máximo de requisições simultâneas
+        batch_size: Tickers por requisição à brapi
         
     Returns:
         Estatísticas da operação
@@ -289,7 +392,7 @@ async def update_ohlcv_latest(session: AsyncSession, tickers: List[str], max_con
         return stats
     
     # Para atualização, usar range curto (5d) e interval 1d
-    return await backfill_ohlcv(session, tickers, range="5d", interval="1d", max_concurrency=max_concurrency)
+    return await backfill_ohlcv(session, tickers, range="5d", interval="1d", max_concurrency=max_concurrency, batch_size=batch_size)
 
 async def get_ohlcv(
     session: AsyncSession,
@@ -311,7 +414,9 @@ async def get_ohlcv(
     Returns:
         Dados OHLCV serializados
     """
-    # Cache muito curto para dados OHLCV (30s)
+    # Candles de pregões fechados não mudam: cache com TTL de quote,
+    # invalidado pelo backfill do ticker (_invalidate_ohlcv_cache)
+    ticker = ticker.upper().strip()
     r = await get_redis()
     cache_key = make_cache_key("ohlcv_v1", ticker, start_date, end_date, limit)
     
@@ -320,7 +425,7 @@ async def get_ohlcv(
         return json.loads(cached)
     
     # Construir query
-    query = select(QuoteOHLCV).where(QuoteOHLCV.ticker == ticker.upper().strip())
+    query = select(QuoteOHLCV).where(QuoteOHLCV.ticker == ticker)
     
     # Aplicar filtros de data
     if start_date:
@@ -355,8 +460,7 @@ async def get_ohlcv(
         "count": len(ohlcv_records)
     }
     
-    # Cache por 30 segundos
-    await r.setex(cache_key, 30, json.dumps(response, default=json_serializer))
+    await r.setex(cache_key, _TTL_QUOTE, json.dumps(response, default=json_serializer))
     
     return response
 
@@ -371,13 +475,42 @@ async def get_available_dates(session: AsyncSession, ticker: str) -> List[str]:
     Returns:
         Lista de datas ISO
     """
+    ticker = ticker.upper().strip()
+    r = await get_redis()
+    cache_key = make_cache_key("ohlcv_dates_v1", ticker)
+    
+    cached = await r.get(cache_key)
+    if cached:
+        return json.loads(cached)
+    
     query = (
         select(QuoteOHLCV.date)
-        .where(QuoteOHLCV.ticker == ticker.upper().strip())
+        .where(QuoteOHLCV.ticker == ticker)
         .order_by(desc(QuoteOHLCV.date))
     )
     
     result = await session.execute(query)
-    dates = result.scalars().all()
+    dates = [date.isoformat() for date in result.scalars().all()]
+    
+    await r.setex(cache_key, _TTL_QUOTE, json.dumps(dates))
+    
+    return dates
+
+async def get_tickers_with_ohlcv(session: AsyncSession) -> List[str]:
+    """
+    Retorna tickers do catálogo que já possuem dados OHLCV.
+    
+    Percorre a tabela de ativos (pequena) com semi-join EXISTS, que usa o
+    índice (ticker, date) de quote_ohlcv, em vez de DISTINCT sobre toda a
+    tabela de candles.
     
-    return [date.isoformat() for date in dates]
+    Args:
+        session: Sessão do banco
+        
+    Returns:
+        Lista de tickers em ordem alfabética
+    """
+    has_ohlcv = exists().where(QuoteOHLCV.ticker == Asset.ticker)
+    query = select(Asset.ticker).where(has_ohlcv).order_by(Asset.ticker)
+    result = await session.execute(query)
+    return list(result.scalars().all())
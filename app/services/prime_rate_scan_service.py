@@ -17,6 +17,8 @@ from app.services.validation import try_validate
 from app.services.utils.key import make_cache_key
 from app.services.utils.json_serializer import json_serializer, normalize_for_json
 
+_TTL_MACRO = settings.cache_ttl_macro_seconds
+
 
 # -------- utils --------
 
@@ -95,12 +97,8 @@ async def _fetch_available_countries() -> Dict[str, Any]:
     if not settings.brapi_token:
         raise ValueError("BRAPI_TOKEN não configurado para /prime-rate/available")
 
-    url = f"{settings.brapi_base_url}/api/v2/prime-rate/available"
-    headers = {"Authorization": f"Bearer {settings.brapi_token}"}
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(url, headers=headers)
-        r.raise_for_status()
-        return r.json()
+    # Cliente HTTP compartilhado (pool + retry + rate limit) em vez de um AsyncClient por chamada
+    return await BrapiClient().prime_rate_available()
 
 
 def _latest_from_payload(country: str, payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[float]]:
@@ -254,8 +252,7 @@ async def scan_prime_rate(
             await session.commit()
 
     # 3) cache + audit (com serializador seguro)
-    ttl = settings.cache_ttl_macro_seconds
-    await r.set(cache_key, json.dumps(agg, separators=(",", ":"), default=json_serializer), ex=ttl)
+    await r.set(cache_key, json.dumps(agg, separators=(",", ":"), default=json_serializer), ex=_TTL_MACRO)
     await _log_call(session, "prime_rate_scan", None, params, False, 200, agg)
 
     return {"cached": False, **agg}
@@ -17,6 +17,8 @@ from app.services.validation import try_validate
 from app.services.ohlcv_service import _extract_ohlcv_from_quote
 from app.services.utils.json_serializer import normalize_for_json as normalize
 
+_TTL_QUOTE = settings.cache_ttl_quote_seconds
+
 def _ts_to_datetime(ts: Any):
     if ts is None:
         return None
@@ -54,9 +56,13 @@ def _extract_snapshots(payload: dict) -> list[QuoteSnapshot]:
         ))
     return out
 
-async def get_quote(session: AsyncSession, tickers: str, params: dict[str, Any]) -> dict[str, Any]:
+# Parte da chave para "sem parâmetros": mantém a mesma chave de quando se passava {}
+_NO_PARAMS: dict[str, Any] = {}
+
+async def get_quote(session: AsyncSession, tickers: str, params: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    """``params=None`` significa nenhum parâmetro extra (range/interval/modules)."""
     r = await get_redis()
-    key = make_cache_key("quote", tickers, params)
+    key = make_cache_key("quote", tickers, params or _NO_PARAMS)
 
     cached_payload = await r.get(key)
     if cached_payload:
@@ -68,8 +74,7 @@ async def get_quote(session: AsyncSession, tickers: str, params: dict[str, Any])
     tick_list = [t.strip() for t in tickers.split(",") if t.strip()]
     payload = await client.quote(tick_list, params)
 
-    ttl = settings.cache_ttl_quote_seconds
-    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=ttl)
+    await r.set(key, json.dumps(payload, separators=(",", ":"), default=json_serializer), ex=_TTL_QUOTE)
 
     ok, obj, err = try_validate("app.openapi_models:QuoteResponse", payload)
     if not ok:
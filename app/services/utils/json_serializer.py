@@ -3,6 +3,8 @@ from datetime import datetime, timezone
 from typing import Any, Optional
 import json
 
+import orjson
+
 
 def json_serializer(obj):
     """
@@ -25,6 +27,14 @@ def json_serializer(obj):
     raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
+def orjson_column_serializer(obj: Any) -> str:
+    """
+    Serializador das colunas JSON do banco (``json_serializer`` do engine):
+    orjson em C em vez de ``json.dumps``; datetime sai em ISO 8601 nativamente.
+    """
+    return orjson.dumps(obj, default=json_serializer, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # ---------------------------------------------------------------------------
 # Normalization helpers used across services (Stage 3)
 # ---------------------------------------------------------------------------
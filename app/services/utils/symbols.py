@@ -0,0 +1,24 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def parse_symbols(raw: str) -> tuple[str, ...]:
+    """
+    Normaliza lista separada por vírgula ("btc, ETH,btc" → ("BTC", "ETH")):
+    maiúsculas, sem vazios/duplicados e ordenada (forma canônica para chaves de cache).
+    """
+    return tuple(sorted({p.strip().upper() for p in raw.split(",") if p.strip()}))
+
+
+@lru_cache(maxsize=1024)
+def _parse_tickers(raw: str) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(t.strip().upper() for t in raw.split(",") if t.strip()))
+
+
+def parse_tickers(raw: str) -> list[str]:
+    """
+    Normaliza lista de tickers separada por vírgula em uma passada:
+    maiúsculas, sem vazios e sem duplicados, preservando a ordem informada.
+    O parse é memoizado pela string bruta; cada chamada recebe uma lista nova.
+    """
+    return list(_parse_tickers(raw))
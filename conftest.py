@@ -5,6 +5,8 @@ import pytest
 import asyncio
 from app.core.http import close_async_client
 from app.core.limits import _DEFAULT_LIMITS
+from app.services._quote_cache import available_cache, crypto_cache, currency_cache
+from app.services.catalog_service import invalidate_catalog_tickers
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -15,3 +17,8 @@ async def cleanup_resources():
     await close_async_client()
     # Limpar limiters globais
     _DEFAULT_LIMITS.clear()
+    # Limpar caches de cotação em processo
+    crypto_cache.clear()
+    currency_cache.clear()
+    available_cache.clear()
+    invalidate_catalog_tickers()
@@ -9,6 +9,7 @@ Este script:
 """
 
 import asyncio
+import logging
 import sys
 import os
 from pathlib import Path
@@ -263,4 +264,6 @@ async def main():
     return all_success
 
 if __name__ == "__main__":
+    # Progresso do sync_assets vem do logger do catalog_service
+    logging.basicConfig(level=logging.INFO, format="      -> %(message)s")
     asyncio.run(main())
@@ -22,6 +22,7 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import logging
 import sys
 from pathlib import Path
 from typing import Iterable, Sequence
@@ -310,5 +311,7 @@ async def main(args: argparse.Namespace) -> None:
 
 
 if __name__ == "__main__":
+    # Progresso do sync_assets vem do logger do catalog_service
+    logging.basicConfig(level=logging.INFO, format="      -> %(message)s")
     ARGS = parse_args()
     asyncio.run(main(ARGS))
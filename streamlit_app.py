@@ -10,6 +10,9 @@ load_dotenv()
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.agent.mcp_agent import build_agent_sync, run_sync
+from app.core.log import setup_logging
+
+setup_logging()
 
 # --- Configuração da Página Streamlit ---
 st.set_page_config(
@@ -12,8 +12,13 @@ from app.services.catalog_service import (
     sync_assets, 
     list_assets, 
     get_asset_by_ticker,
+    get_catalog_tickers,
+    invalidate_catalog_tickers,
     _normalize_asset_type,
-    _extract_assets_from_list
+    _extract_assets_from_list,
+    _encode_cursor,
+    _decode_cursor,
+    _upsert_assets_stmt,
 )
 from app.services.quote_service import cleanup_quote_artifacts
 from app.services.crypto_service import cleanup_crypto_artifacts
@@ -179,12 +184,57 @@ class TestAssetExtraction:
         assert assets[0].name is None
 
 
+class TestCatalogCursor:
+    """Testes para o cursor da paginação keyset."""
+
+    def test_cursor_roundtrip(self):
+        cursor = _encode_cursor("name", ["PETROBRAS PN", 123])
+        assert _decode_cursor(cursor, "name") == ["PETROBRAS PN", 123]
+
+    def test_cursor_roundtrip_updated_at(self):
+        ts = datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+        cursor = _encode_cursor("updated_at", [ts, 7])
+        assert _decode_cursor(cursor, "updated_at") == [ts, 7]
+
+    def test_cursor_rejects_other_sort(self):
+        cursor = _encode_cursor("name", ["PETROBRAS PN", 123])
+        with pytest.raises(ValueError):
+            _decode_cursor(cursor, "ticker")
+
+    def test_cursor_rejects_garbage(self):
+        with pytest.raises(ValueError):
+            _decode_cursor("not-a-cursor", "name")
+
+
+class TestAssetUpsert:
+    """Testes para o UPSERT em lote do sync."""
+
+    def test_upsert_keeps_existing_values_when_empty(self):
+        from sqlalchemy.dialects import mysql
+
+        stmt = _upsert_assets_stmt([
+            Asset(ticker="PETR4", name=" ", type="stock", raw={"symbol": "PETR4"}),
+            Asset(ticker="VALE3", name="VALE ON", type="stock"),
+        ])
+        compiled = stmt.compile(dialect=mysql.dialect())
+        sql = str(compiled)
+
+        assert "ON DUPLICATE KEY UPDATE" in sql
+        assert "name = coalesce(VALUES(name), assets.name)" in sql
+        assert "raw = VALUES(raw)" in sql
+        # Nome só com espaços vira NULL para preservar o valor gravado
+        assert compiled.params["name_m0"] is None
+        assert compiled.params["name_m1"] == "VALE ON"
+
+
 @pytest.mark.asyncio
 class TestCatalogService:
     """Testes para o serviço de catálogo."""
     
-    async def test_get_asset_by_ticker_found(self):
+    @patch('app.services.catalog_service.get_redis')
+    async def test_get_asset_by_ticker_found(self, mock_get_redis):
         """Testa busca de ativo existente."""
+        mock_get_redis.return_value = AsyncMock(get=AsyncMock(return_value=None))
         mock_session = AsyncMock(spec=AsyncSession)
         mock_result = MagicMock()
         mock_result.scalar_one_or_none.return_value = Asset(
@@ -201,8 +251,10 @@ class TestCatalogService:
         assert asset.name == "PETROBRAS PN"
         assert asset.type == "stock"
     
-    async def test_get_asset_by_ticker_not_found(self):
+    @patch('app.services.catalog_service.get_redis')
+    async def test_get_asset_by_ticker_not_found(self, mock_get_redis):
         """Testa busca de ativo inexistente."""
+        mock_get_redis.return_value = AsyncMock(get=AsyncMock(return_value=None))
         mock_session = AsyncMock(spec=AsyncSession)
         mock_result = MagicMock()
         mock_result.scalar_one_or_none.return_value = None
@@ -211,9 +263,39 @@ class TestCatalogService:
         asset = await get_asset_by_ticker(mock_session, "NOTFOUND")
         
         assert asset is None
+        # Ausência não é cacheada
+        mock_get_redis.return_value.setex.assert_not_called()
+
+    @patch('app.services.catalog_service.get_redis')
+    async def test_get_asset_by_ticker_cached(self, mock_get_redis):
+        """Ativo em cache não consulta o banco; acerto no banco é cacheado."""
+        mock_redis = AsyncMock()
+        mock_redis.get = AsyncMock(return_value=None)
+        mock_get_redis.return_value = mock_redis
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = Asset(
+            ticker="PETR4",
+            name="PETROBRAS PN",
+            updated_at=datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc),
+        )
+        mock_session.execute = AsyncMock(return_value=mock_result)
+
+        await get_asset_by_ticker(mock_session, "PETR4")
+        key, _, payload = mock_redis.setex.call_args.args
+        assert key == make_cache_key("asset", "PETR4")
+
+        mock_redis.get = AsyncMock(return_value=payload)
+        asset = await get_asset_by_ticker(mock_session, "petr4")
+
+        assert mock_session.execute.call_count == 1
+        assert asset.name == "PETROBRAS PN"
+        assert asset.updated_at == datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
     
-    async def test_get_asset_by_ticker_normalization(self):
+    @patch('app.services.catalog_service.get_redis')
+    async def test_get_asset_by_ticker_normalization(self, mock_get_redis):
         """Testa normalização do ticker."""
+        mock_get_redis.return_value = AsyncMock(get=AsyncMock(return_value=None))
         mock_session = AsyncMock(spec=AsyncSession)
         mock_result = MagicMock()
         mock_result.scalar_one_or_none.return_value = Asset(ticker="PETR4")
@@ -225,6 +307,21 @@ class TestCatalogService:
             assert asset is not None
             assert asset.ticker == "PETR4"
     
+    async def test_get_catalog_tickers_cached_until_invalidated(self):
+        """Testa que o conjunto de tickers é carregado uma vez e recarregado após invalidação."""
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = ["PETR4", "VALE3"]
+        mock_session.execute = AsyncMock(return_value=mock_result)
+        
+        assert await get_catalog_tickers(mock_session) == frozenset({"PETR4", "VALE3"})
+        assert await get_catalog_tickers(mock_session) == frozenset({"PETR4", "VALE3"})
+        assert mock_session.execute.call_count == 1
+        
+        invalidate_catalog_tickers()
+        await get_catalog_tickers(mock_session)
+        assert mock_session.execute.call_count == 2
+    
     @patch('app.services.catalog_service.get_redis')
     async def test_list_assets_with_cache(self, mock_get_redis):
         """Testa listagem de ativos com cache."""
@@ -245,8 +342,9 @@ class TestCatalogService:
         mock_session.execute.assert_not_called()
     
     @patch('json.dumps')  # Patchear json.dumps globalmente
+    @patch('app.services.catalog_service._count_assets', new_callable=AsyncMock, return_value=1)
     @patch('app.services.catalog_service.get_redis')
-    async def test_list_assets_without_cache(self, mock_get_redis, mock_json_dumps):
+    async def test_list_assets_without_cache(self, mock_get_redis, mock_count_assets, mock_json_dumps):
         """Testa listagem de ativos sem cache (cache miss)."""
         # Mock json.dumps para retornar string sem tentar serializar
         mock_json_dumps.return_value = '{"test": "data"}'
@@ -260,35 +358,28 @@ class TestCatalogService:
         # Mock banco
         mock_session = AsyncMock(spec=AsyncSession)
         
-        # Mock result para select de assets
+        # Mock result para select de assets (projeção de colunas)
         mock_assets_result = MagicMock()
-        mock_scalars = MagicMock()
+        mock_mappings = MagicMock()
         
-        # Criar asset com todos os campos explícitos
-        test_asset = Asset(
-            ticker="PETR4",
-            name="PETROBRAS PN",
-            type="stock",
-            sector="Petróleo",
-            segment=None,
-            isin=None,
-            logo_url=None,
-            raw=None,
-            updated_at=datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc),
-            created_at=datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc),
-            id=None
-        )
-        
-        mock_scalars.all.return_value = [test_asset]
-        mock_assets_result.scalars.return_value = mock_scalars
+        # Linha com todas as colunas projetadas
+        test_row = {
+            "id": 1,
+            "ticker": "PETR4",
+            "name": "PETROBRAS PN",
+            "type": "stock",
+            "sector": "Petróleo",
+            "segment": None,
+            "isin": None,
+            "logo_url": None,
+            "updated_at": datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc),
+        }
         
-        # Mock result para count
-        mock_count_result = MagicMock()
-        mock_count_result.scalar.return_value = 1
+        mock_mappings.all.return_value = [test_row]
+        mock_assets_result.mappings.return_value = mock_mappings
         
-        # session.execute retorna diferentes resultados em cada chamada
-        # ORDEM: primeiro count (linha 333), depois assets (linha 351)
-        mock_session.execute = AsyncMock(side_effect=[mock_count_result, mock_assets_result])
+        # COUNT roda em sessão própria (_count_assets, mockado); a sessão só recebe a página
+        mock_session.execute = AsyncMock(return_value=mock_assets_result)
         
         result = await list_assets(mock_session)
         
@@ -296,13 +387,35 @@ class TestCatalogService:
         assert "pagination" in result
         assert len(result["assets"]) == 1
         assert result["assets"][0]["ticker"] == "PETR4"
+        assert result["assets"][0]["updated_at"] == "2024-01-15T12:00:00+00:00"
         
-        # Verifica que cache foi setado
-        mock_redis.setex.assert_called_once()
+        # Verifica que cache foi setado (total por filtro + página)
+        assert mock_redis.setex.call_count == 2
+        count_key = mock_redis.setex.call_args_list[0].args[0]
+        assert count_key.startswith("catalog_v1_count:")
+        mock_count_assets.assert_awaited_once()
+
+    @patch('app.services.catalog_service.get_redis')
+    async def test_list_assets_uses_cached_total(self, mock_get_redis):
+        """Total em cache dispensa o COUNT: só a consulta da página vai ao banco."""
+        mock_redis = AsyncMock()
+        mock_redis.get = AsyncMock(side_effect=[None, b"7"])
+        mock_get_redis.return_value = mock_redis
+
+        mock_assets_result = MagicMock()
+        mock_assets_result.mappings.return_value.all.return_value = []
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute = AsyncMock(return_value=mock_assets_result)
+
+        result = await list_assets(mock_session)
+
+        assert result["pagination"]["total"] == 7
+        assert mock_session.execute.call_count == 1
     
+    @patch('app.services.catalog_service.get_redis', new_callable=AsyncMock)
     @patch('app.services.catalog_service.BrapiClient')
     @patch('app.services.catalog_service._log_call')
-    async def test_sync_assets_success(self, mock_log_call, mock_brapi_client):
+    async def test_sync_assets_success(self, mock_log_call, mock_brapi_client, mock_get_redis):
         """Testa sincronização de ativos com sucesso."""
         # Mock BrapiClient
         mock_client = AsyncMock()
@@ -342,6 +455,99 @@ class TestCatalogService:
         # Verifica que logou a chamada
         mock_log_call.assert_called()
 
+    @patch('app.services.catalog_service.get_redis', new_callable=AsyncMock)
+    @patch('app.services.catalog_service.BrapiClient')
+    @patch('app.services.catalog_service._log_call')
+    async def test_sync_assets_multiple_pages(self, mock_log_call, mock_brapi_client, mock_get_redis):
+        """Testa sincronização com páginas restantes buscadas em paralelo."""
+        async def quote_list(*, type, page, page_size):
+            return {
+                "stocks": [{"symbol": f"TST{page}", "name": f"TEST {page}", "type": "stock", "sector": "Test"}],
+                "hasNextPage": page < 3,
+                "currentPage": page,
+                "totalPages": 3,
+            }
+
+        mock_client = AsyncMock()
+        mock_client.quote_list = AsyncMock(side_effect=quote_list)
+        mock_client.quote = AsyncMock(return_value={"results": []})
+        mock_brapi_client.return_value = mock_client
+
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = None
+        mock_session.execute = AsyncMock(return_value=mock_result)
+        mock_session.commit = AsyncMock()
+
+        stats = await sync_assets(mock_session, "stock", 1)
+
+        assert stats["pages"] == 3
+        assert stats["processed"] == 3
+        assert stats["inserted"] == 3
+        assert mock_client.quote_list.await_count == 3
+        requested_pages = sorted(call.kwargs["page"] for call in mock_client.quote_list.await_args_list)
+        assert requested_pages == [1, 2, 3]
+
+
+    @patch('app.services.catalog_service.get_redis', new_callable=AsyncMock)
+    @patch('app.services.catalog_service.BrapiClient')
+    @patch('app.services.catalog_service._log_call')
+    async def test_sync_assets_invalidates_asset_cache_after_commit(self, mock_log_call, mock_brapi_client, mock_get_redis):
+        """Cache por ticker só é invalidado depois do commit que grava a página."""
+        mock_client = AsyncMock()
+        mock_client.quote_list = AsyncMock(return_value={
+            "stocks": [{"symbol": "TEST4", "name": "TEST STOCK", "type": "stock", "sector": "Test", "logourl": "x"}],
+            "hasNextPage": False,
+        })
+        mock_brapi_client.return_value = mock_client
+
+        events = []
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.execute = AsyncMock(return_value=MagicMock())
+        mock_session.commit = AsyncMock(side_effect=lambda: events.append("commit"))
+        mock_redis = mock_get_redis.return_value
+        mock_redis.unlink = AsyncMock(side_effect=lambda *keys: events.append(("unlink", keys)))
+
+        await sync_assets(mock_session, "stock", 100)
+
+        assert events == ["commit", ("unlink", (make_cache_key("asset", "TEST4"),))]
+
+    @patch('app.services.catalog_service.get_redis', new_callable=AsyncMock)
+    @patch('app.services.catalog_service.BrapiClient')
+    @patch('app.services.catalog_service._log_call')
+    async def test_sync_assets_error_keeps_original_exception(self, mock_log_call, mock_brapi_client, mock_get_redis):
+        """Com a transação já falha, faz rollback em vez de commit e propaga o erro original."""
+        mock_client = AsyncMock()
+        mock_client.quote_list = AsyncMock(side_effect=RuntimeError("upstream down"))
+        mock_brapi_client.return_value = mock_client
+
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.get_transaction = MagicMock(return_value=MagicMock(is_active=False))
+
+        with pytest.raises(RuntimeError, match="upstream down"):
+            await sync_assets(mock_session, "stock", 100)
+
+        mock_session.rollback.assert_awaited_once()
+        mock_session.commit.assert_not_called()
+
+    @patch('app.services.catalog_service.get_redis', new_callable=AsyncMock)
+    @patch('app.services.catalog_service.BrapiClient')
+    @patch('app.services.catalog_service._log_call')
+    async def test_sync_assets_error_commits_usable_session(self, mock_log_call, mock_brapi_client, mock_get_redis):
+        """Com a sessão utilizável, as páginas pendentes são commitadas antes de propagar o erro."""
+        mock_client = AsyncMock()
+        mock_client.quote_list = AsyncMock(side_effect=RuntimeError("upstream down"))
+        mock_brapi_client.return_value = mock_client
+
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.get_transaction = MagicMock(return_value=MagicMock(is_active=True))
+
+        with pytest.raises(RuntimeError, match="upstream down"):
+            await sync_assets(mock_session, "stock", 100)
+
+        mock_session.commit.assert_awaited_once()
+        mock_session.rollback.assert_not_called()
+
 
 @pytest.fixture
 def sample_assets():
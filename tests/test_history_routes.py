@@ -0,0 +1,20 @@
+"""
+Testes da validação de ticker das rotas de histórico.
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.history import _validate_ticker
+
+
+@pytest.mark.parametrize("ticker", ["PETR4", "HGLG11", "PETR4F", "M1TA34", "A1MD34", "n1vd34", "^BVSP"])
+def test_validate_ticker_accepts(ticker):
+    _validate_ticker(ticker)
+
+
+@pytest.mark.parametrize("ticker", ["", "PETR", "PETR123", "PETR4-X", "^"])
+def test_validate_ticker_rejects(ticker):
+    with pytest.raises(HTTPException) as exc:
+        _validate_ticker(ticker)
+    assert exc.value.status_code == 400
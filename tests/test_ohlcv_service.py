@@ -13,6 +13,7 @@ from app.services.ohlcv_service import (
     backfill_ohlcv,
     _parse_timestamp,
     _extract_ohlcv_from_quote,
+    _invalidate_ohlcv_cache,
     get_available_dates
 )
 from app.models import QuoteOHLCV
@@ -224,9 +225,10 @@ class TestOHLCVService:
         call_args = mock_session.execute.call_args[0][0]
         # O query construído deve incluir os filtros de data
     
+    @patch('app.services.ohlcv_service._invalidate_ohlcv_cache')
     @patch('app.services.ohlcv_service._fetch_quote_with_semaphore')
     @patch('app.services.ohlcv_service._log_call')
-    async def test_backfill_ohlcv_wrapper(self, mock_log_call, mock_fetch):
+    async def test_backfill_ohlcv_wrapper(self, mock_log_call, mock_fetch, mock_invalidate):
         """Testa backfill com múltiplos tickers."""
         # Mock resposta da API para cada ticker
         mock_fetch.return_value = {
@@ -252,9 +254,87 @@ class TestOHLCVService:
         assert result["processed"] == 2
         assert result["inserted"] == 130  # 65 per ticker
         assert result["total_requested"] == 2
+        mock_invalidate.assert_awaited_once_with(["PETR4", "VALE3"])
     
-    async def test_get_available_dates(self):
+    @patch('app.services.ohlcv_service._invalidate_ohlcv_cache')
+    @patch('app.services.ohlcv_service._fetch_quote_with_semaphore')
+    @patch('app.services.ohlcv_service._log_call')
+    async def test_backfill_ohlcv_batched(self, mock_log_call, mock_fetch, mock_invalidate):
+        """Testa backfill em lote: uma chamada à API para vários tickers."""
+        candle = {"date": 1705123200, "open": 38.20, "high": 39.00, "low": 37.80, "close": 38.50, "volume": 45678901}
+        mock_fetch.return_value = {
+            "results": [
+                {"symbol": "PETR4", "historicalDataPrice": [candle] * 2},
+                {"symbol": "VALE3", "historicalDataPrice": [candle] * 3},
+            ]
+        }
+        
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = None
+        mock_session.execute = AsyncMock(return_value=mock_result)
+        
+        result = await backfill_ohlcv(mock_session, ["PETR4", "VALE3"], batch_size=2)
+        
+        mock_fetch.assert_called_once()
+        assert result["processed"] == 2
+        assert result["inserted"] == 5
+    
+    @patch('app.services.ohlcv_service._invalidate_ohlcv_cache')
+    @patch('app.services.ohlcv_service._fetch_quote_single')
+    @patch('app.services.ohlcv_service._log_call')
+    async def test_backfill_ohlcv_batches_respect_max_concurrency(self, mock_log_call, mock_fetch_single, mock_invalidate):
+        """Lotes são buscados em paralelo, limitados por max_concurrency."""
+        in_flight = 0
+        peak = 0
+
+        async def fetch(client, batch, range_period, interval):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"results": [{"symbol": t, "historicalDataPrice": []} for t in batch]}
+
+        mock_fetch_single.side_effect = fetch
+        mock_session = AsyncMock(spec=AsyncSession)
+
+        tickers = [f"TST{i}" for i in range(12)]
+        result = await backfill_ohlcv(mock_session, tickers, batch_size=2, max_concurrency=3)
+
+        assert mock_fetch_single.await_count == 6
+        assert peak == 3
+        assert result["processed"] == 12
+    
+    @patch('app.core.cache.get_redis')
+    @patch('app.services.ohlcv_service.get_redis')
+    async def test_invalidate_ohlcv_cache_unlinks_in_one_batch(self, mock_get_redis, mock_cache_get_redis):
+        """Chaves dos tickers atualizados são removidas com um único UNLINK."""
+        keys = [b"ohlcv_v1:PETR4:a", b"ohlcv_dates_v1:PETR4:b", b"ohlcv_v1:VALE3:c", b"ohlcv_v1:PETR40:d"]
+
+        async def scan_iter(match, count):
+            for key in keys:
+                yield key
+
+        mock_redis = MagicMock()
+        mock_redis.scan_iter = scan_iter
+        mock_redis.unlink = AsyncMock(return_value=2)
+        mock_redis.delete = AsyncMock()
+        mock_get_redis.return_value = mock_redis
+        mock_cache_get_redis.return_value = mock_redis
+
+        await _invalidate_ohlcv_cache(["petr4"])
+
+        mock_redis.unlink.assert_awaited_once_with(b"ohlcv_v1:PETR4:a", b"ohlcv_dates_v1:PETR4:b")
+        mock_redis.delete.assert_not_called()
+
+    @patch('app.services.ohlcv_service.get_redis')
+    async def test_get_available_dates(self, mock_get_redis):
         """Testa busca de datas disponíveis."""
+        mock_redis = AsyncMock()
+        mock_redis.get.return_value = None
+        mock_get_redis.return_value = mock_redis
+        
         mock_session = AsyncMock(spec=AsyncSession)
         mock_result = MagicMock()
         
@@ -281,6 +361,9 @@ class TestOHLCVService:
         # Deve estar em ordem decrescente (mais recentes primeiro)
         assert result[0] == "2024-01-15T00:00:00+00:00"
         assert result[-1] == "2024-01-11T00:00:00+00:00"
+        
+        # Resultado vai para o cache
+        mock_redis.setex.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -299,9 +382,10 @@ class TestOHLCVIntegration:
         assert result["errors"] == 0
         assert result["total_requested"] == 0
     
+    @patch('app.services.ohlcv_service._invalidate_ohlcv_cache')
     @patch('app.services.ohlcv_service._fetch_quote_with_semaphore')
     @patch('app.services.ohlcv_service._log_call')
-    async def test_single_ticker_processing(self, mock_log_call, mock_fetch):
+    async def test_single_ticker_processing(self, mock_log_call, mock_fetch, mock_invalidate):
         """Testa processamento de um único ticker."""
         # Mock resposta da API
         mock_fetch.return_value = {
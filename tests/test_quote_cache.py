@@ -0,0 +1,54 @@
+"""
+Testes para o cache em processo de cotações (crypto/currency).
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services._quote_cache import TTLCache, crypto_cache
+from app.services.crypto_service import get_crypto
+
+
+class TestTTLCache:
+    """Testes para o TTLCache."""
+
+    def test_hit_and_miss(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        assert cache.get("BTC") is None
+        cache.set("BTC", {"coins": []})
+        assert cache.get("BTC") == {"coins": []}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expired_entry(self):
+        cache = TTLCache(maxsize=2, ttl=0)
+        cache.set("BTC", {"coins": []})
+        assert cache.get("BTC") is None
+        assert cache.stats()["size"] == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("A", 1)
+        cache.set("B", 2)
+        cache.get("A")
+        cache.set("C", 3)
+        assert cache.get("B") is None
+        assert cache.get("A") == 1
+        assert cache.get("C") == 3
+
+
+@pytest.mark.asyncio
+class TestCryptoHotCache:
+    """Testes do cache em processo no serviço de cripto."""
+
+    @patch('app.services.crypto_service._log_call')
+    @patch('app.services.crypto_service.get_redis')
+    async def test_hot_cache_skips_redis(self, mock_get_redis, mock_log_call):
+        crypto_cache.set((("BTC", "ETH"), "USD"), {"coins": [{"coin": "BTC"}]})
+        mock_session = AsyncMock(spec=AsyncSession)
+
+        result = await get_crypto(mock_session, "eth, btc,BTC", "usd")
+
+        assert result == {"cached": True, "results": {"coins": [{"coin": "BTC"}]}}
+        mock_get_redis.assert_not_called()